@@ -0,0 +1,231 @@
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+import pygame.font
+import pygame.image
+
+import io
+import sys
+import json
+import mmap
+import struct
+import argparse
+from typing import BinaryIO, Dict, Iterator, List, Tuple, Union
+
+from kfiles import KFile
+from kauxiliaries import KColor, KFont
+
+ASSET_PATH = "assets.kpack"
+
+
+class KAssetPack():
+    MAGIC = b'KNGPACK1'
+    HEADER = struct.Struct('<8sII')
+    ALIGN = 64
+    IMAGE_FORMAT = 'RGBA'
+    CLUE_SIZES = (10, 16, 20, 25, 31)
+    CLUE_NUMBERS = range(0, 51)
+    TITLE_SIZE = 50
+    TITLE_TEXT = "NONOGRAMS!"
+    SUBTITLE_SIZE = 30
+    TEXT_COLOR = KColor.name('black')
+    SOUNDS = ("opening.ogg", "looping.ogg", "closing.ogg")
+
+    def __init__(self, fpath:str):
+        self.fpath = fpath
+        self.surfaces = dict()
+        with open(fpath, 'rb') as pack:
+            # Copy-on-write: pages are read lazily and a surface that gets
+            # drawn on never writes back into the pack.
+            self.buffer = mmap.mmap(pack.fileno(), 0, access=mmap.ACCESS_COPY)
+        try:
+            magic, _n, self.data_start = KAssetPack.HEADER.unpack_from(
+                self.buffer, 0
+            )
+            if magic != KAssetPack.MAGIC:
+                raise ValueError(f"{fpath} is not a Nonograms asset pack")
+            _start = KAssetPack.HEADER.size
+            self.entries = json.loads(bytes(self.buffer[_start:_start+_n]))
+            if not isinstance(self.entries, dict):
+                raise ValueError(f"{fpath} has a broken index")
+            for name, entry in self.entries.items():
+                KAssetPack.check(name, entry)
+            _end = max(
+                (entry['offset'] + entry['length']
+                for entry in self.entries.values()),
+                default = 0
+            )
+            if self.data_start + _end > len(self.buffer):
+                raise ValueError(f"{fpath} is truncated")
+        except struct.error as error:
+            self.buffer.close()
+            raise ValueError(f"{fpath} is truncated") from error
+        except ValueError:
+            self.buffer.close()
+            raise
+        self.view = memoryview(self.buffer)
+
+    @staticmethod
+    def check(name:str, entry:Dict) -> None:
+        # Everything the lookups below index into, so a malformed entry is
+        # rejected here rather than on first use.
+        try:
+            if int(entry['offset']) < 0 or int(entry['length']) < 0:
+                raise ValueError
+            if not name.startswith("sound/"):
+                width, height = (int(num) for num in entry['size'])
+                if width*height*len(KAssetPack.IMAGE_FORMAT) \
+                    != entry['length']:
+                    raise ValueError
+            if name.startswith("opening/"):
+                int(name.rsplit('/', 1)[1])
+            if name.startswith("text/"):
+                meta = entry['meta']
+                str(meta['text']), int(meta['size']), tuple(meta['color'])
+        except (KeyError, TypeError, ValueError) as error:
+            raise ValueError(f"broken asset index entry {name!r}") from error
+
+    def __contains__(self, name:str) -> bool:
+        return name in self.entries
+
+    def names(self, prefix:str) -> List[str]:
+        return [name for name in self.entries if name.startswith(prefix)]
+
+    def blob(self, name:str) -> memoryview:
+        entry = self.entries[name]
+        _start = self.data_start + entry['offset']
+        return self.view[_start:_start+entry['length']]
+
+    def image(self, name:str) -> pygame.Surface:
+        surface = self.surfaces.get(name)
+        if surface is None:
+            surface = self.surfaces[name] = pygame.image.frombuffer(
+                self.blob(name),
+                tuple(self.entries[name]['size']),
+                KAssetPack.IMAGE_FORMAT
+            )
+        return surface
+
+    def frames(self, name:str) -> List[pygame.Surface]:
+        _names = sorted(
+            self.names(f"{name}/"), key=lambda n: int(n.rsplit('/', 1)[1])
+        )
+        return [self.image(frame) for frame in _names]
+
+    def music(self, name:str) -> io.BytesIO:
+        return io.BytesIO(self.blob(f"sound/{name}"))
+
+    def texts(self) -> Iterator[Tuple[str, int, Tuple, pygame.Surface]]:
+        for name in self.names("text/"):
+            meta = self.entries[name]['meta']
+            yield meta['text'], meta['size'], tuple(meta['color']), \
+                self.image(name)
+
+    def install_texts(self) -> int:
+        _count = 0
+        for text, size, color, surface in self.texts():
+            KFont.add_prerendered(text, size, color, surface)
+            _count += 1
+        return _count
+
+    @staticmethod
+    def write(
+        fpath:str,
+        images:Dict[str, Tuple[bytes, Tuple[int, int], Dict]],
+        blobs:Dict[str, bytes]
+        ) -> None:
+        entries = dict()
+        chunks = list()
+        _offset = 0
+        for name, (data, size, meta) in images.items():
+            entries[name] = {
+                'offset': _offset, 'length': len(data), 'size': list(size),
+                'meta': meta
+            }
+            chunks.append(data)
+            _offset += -(-len(data)//KAssetPack.ALIGN) * KAssetPack.ALIGN
+        for name, data in blobs.items():
+            entries[name] = {'offset': _offset, 'length': len(data)}
+            chunks.append(data)
+            _offset += -(-len(data)//KAssetPack.ALIGN) * KAssetPack.ALIGN
+        _index = json.dumps(entries).encode()
+        _start = KAssetPack.HEADER.size + len(_index)
+        _start = -(-_start//KAssetPack.ALIGN) * KAssetPack.ALIGN
+
+        def _write(pack:BinaryIO) -> None:
+            pack.write(
+                KAssetPack.HEADER.pack(KAssetPack.MAGIC, len(_index), _start)
+            )
+            pack.write(_index)
+            for data in chunks:
+                pack.write(b'\0' * (-pack.tell() % KAssetPack.ALIGN))
+                pack.write(data)
+
+        KFile.write_atomic(fpath, _write)
+
+
+def render_text(text:str, size:int) -> Tuple[bytes, Tuple[int, int], Dict]:
+    surface = KFont.get(size).render(text, True, KAssetPack.TEXT_COLOR)
+    return (
+        pygame.image.tostring(surface, KAssetPack.IMAGE_FORMAT),
+        surface.get_size(),
+        {'text': text, 'size': size, 'color': list(KAssetPack.TEXT_COLOR)}
+    )
+
+
+def build(fpath:str = ASSET_PATH, root:str = os.getcwd()) -> Dict[str, int]:
+    from PIL import Image
+    from kwindows import KWindow, __version__
+    pygame.font.init()
+    images = dict()
+    blobs = dict()
+    _gif = os.path.join(root, "Images", "interesting.gif")
+    if os.path.exists(_gif):
+        with Image.open(_gif) as image:
+            for i in range(getattr(image, 'n_frames', 1)):
+                image.seek(i)
+                _img = image.convert(KAssetPack.IMAGE_FORMAT)
+                images[f"opening/{i}"] = (_img.tobytes(), _img.size, dict())
+    _icon = KWindow.make_icon()
+    images["icon"] = (
+        pygame.image.tostring(_icon, KAssetPack.IMAGE_FORMAT),
+        _icon.get_size(),
+        dict()
+    )
+    _texts = [
+        (str(num), size)
+        for size in KAssetPack.CLUE_SIZES for num in KAssetPack.CLUE_NUMBERS
+    ]
+    _texts += [(char, KAssetPack.TITLE_SIZE) for char in KAssetPack.TITLE_TEXT]
+    _texts.append((f"- ver {__version__}", KAssetPack.SUBTITLE_SIZE))
+    for text, size in dict.fromkeys(_texts):
+        images[f"text/{size}/{text}"] = render_text(text, size)
+    for sound in KAssetPack.SOUNDS:
+        _path = os.path.join(root, "Sounds", sound)
+        if os.path.exists(_path):
+            with open(_path, 'rb') as source:
+                blobs[f"sound/{sound}"] = source.read()
+    KAssetPack.write(fpath, images, blobs)
+    return {
+        'images': len(images),
+        'blobs': len(blobs),
+        'bytes': os.path.getsize(fpath)
+    }
+
+
+def main(argv:Union[List[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Build the pre-converted Nonograms asset pack."
+    )
+    parser.add_argument(
+        '-o', '--output', default=ASSET_PATH,
+        help=f"pack file to write (default: {ASSET_PATH})"
+    )
+    args = parser.parse_args(argv)
+    json.dump(build(args.output), sys.stdout)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,7 @@ import pygame
 from pygame.colordict import THECOLORS
 
 import random
+from collections import OrderedDict
 from typing import Union, Tuple, Dict, List
 
 
@@ -49,4 +50,67 @@ class KColor(pygame.Color):
             255 - self.g,
             255 - self.b,
             255 - self.a if alpha else self.a
-        )
\ No newline at end of file
+        )
+
+
+class KFont():
+    FONTS = dict()
+    TEXTS = OrderedDict()
+    PRERENDERED = dict()
+    BUDGET = 8 * 1024 * 1024
+    USED = 0
+
+    @classmethod
+    def get(cls, size:int, name:Union[str, None]=None) -> pygame.font.Font:
+        _name = pygame.font.get_default_font() if name is None else name
+        font = cls.FONTS.get((_name, size))
+        if font is None:
+            font = cls.FONTS[(_name, size)] = pygame.font.SysFont(_name, size)
+        return font
+
+    @classmethod
+    def render(
+        cls,
+        text:str,
+        size:int,
+        color:pygame.Color,
+        name:Union[str, None] = None
+        ) -> pygame.Surface:
+        key = (text, size, tuple(color), name)
+        surface = cls.PRERENDERED.get(key)
+        if surface is not None:
+            return surface
+        surface = cls.TEXTS.get(key)
+        if surface is not None:
+            cls.TEXTS.move_to_end(key)
+            return surface
+        surface = cls.get(size, name).render(text, True, color)
+        cls.TEXTS[key] = surface
+        cls.USED += KFont.cost(surface)
+        while cls.USED > cls.BUDGET and len(cls.TEXTS) > 1:
+            _, _surface = cls.TEXTS.popitem(last=False)
+            cls.USED -= KFont.cost(_surface)
+        return surface
+
+    @classmethod
+    def add_prerendered(
+        cls,
+        text:str,
+        size:int,
+        color:Tuple[int, ...],
+        surface:pygame.Surface,
+        name:Union[str, None] = None
+        ) -> None:
+        cls.PRERENDERED[(text, size, tuple(color), name)] = surface
+
+    @staticmethod
+    def cost(surface:pygame.Surface) -> int:
+        _w, _h = surface.get_size()
+        return _w * _h * surface.get_bytesize()
+
+    @classmethod
+    def clear(cls) -> None:
+        cls.FONTS.clear()
+        cls.TEXTS.clear()
+        cls.PRERENDERED.clear()
+        cls.USED = 0
@@ -0,0 +1,450 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+import sys
+import json
+import math
+import time
+import random
+import platform
+import argparse
+import tempfile
+import numpy
+from PIL import Image
+from typing import Callable, Dict, List, Tuple, Union
+
+from kpuzzles import ____PUZZLE01____
+from kauxiliaries import KType, KColor
+from kobjects import KObject, KBlock, KGIF
+from knonograms import KNonograms
+from ksaves import KSaveFile
+from kjournal import KJournal
+from kcatalog import KCatalog, make_puzzle
+from kwindows import __version__
+
+SIZES = (25, 50, 100, 200)
+VIEW_SIZE = (950, 950)
+
+
+def rss() -> int:
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def timed(func:Callable, repeat:int = 1) -> Dict[str, float]:
+    _times = list()
+    for _ in range(repeat):
+        _t0 = time.perf_counter()
+        func()
+        _times.append(time.perf_counter() - _t0)
+    return {
+        'repeat': repeat,
+        'best': min(_times),
+        'mean': sum(_times) / repeat
+    }
+
+
+def make_board(
+    screen:pygame.Surface,
+    size:int,
+    puzzle:Union[KType.Puzzle, None] = None,
+    view_size:Union[Tuple[int, int], None] = None
+    ) -> KNonograms:
+    if puzzle is None:
+        _num = (size//5, size//5)
+    else:
+        hdict, vdict = puzzle
+        _num = (
+            max(len(nlist) for nlist in hdict.values()),
+            max(len(nlist) for nlist in vdict.values())
+        )
+        if view_size is None:
+            # The full layout needs a clue panel the image grid divides.
+            _step = size // math.gcd(size, 10)
+            _num = tuple(-(-num//_step) * _step for num in _num)
+    return KNonograms(
+        screen,
+        position = (0, 0),
+        num_mainblocks = (size, size),
+        num_numblocks = _num,
+        size_mainblock = (10, 10),
+        color_mainblocks = KColor.name('white'),
+        color_numblocks = KColor.name('yellow'),
+        view_size = view_size
+    )
+
+
+def make_nonograms(screen:pygame.Surface) -> KNonograms:
+    nng = KNonograms(
+        screen,
+        position = (100, 100),
+        num_mainblocks = (25, 25),
+        num_numblocks = (7, 7),
+        size_mainblock = (25, 25),
+        color_mainblocks = KColor.name('white'),
+        color_numblocks = KColor.name('yellow')
+    )
+    nng.register(____PUZZLE01____)
+    nng.draw_all()
+    return nng
+
+
+def fill_history(nng:KNonograms, num_moves:int, reset_every:int) -> None:
+    _main = nng.states[KNonograms.MAIN]
+    _w, _h = _main.shape
+    for i in range(num_moves):
+        if i % reset_every == reset_every - 1:
+            nng.history.push_reset(nng.states)
+            _main.fill(KBlock.EMPTY)
+            continue
+        xi, yi = random.randrange(_w), random.randrange(_h)
+        _state = random.choice((KBlock.FILLED, KBlock.CROSSED, KBlock.EMPTY))
+        nng.history.push_move(
+            KNonograms.MAIN, (xi, yi), int(_main[xi, yi]), _state
+        )
+        _main[xi, yi] = _state
+    nng.import_states(nng.export_states())
+
+
+def bench_undo(
+    screen:pygame.Surface,
+    num_moves:int,
+    reset_every:int = 1000,
+    repeat:int = 50
+    ) -> Dict[str, float]:
+    nng = make_nonograms(screen)
+    fill_history(nng, num_moves, reset_every)
+    nng.reset()
+    _t0 = time.perf_counter()
+    for _ in range(repeat):
+        nng.undo()
+        nng.redo()
+    _reset = (time.perf_counter() - _t0) / (2*repeat)
+    nng.undo()
+    nng.history.push_move(KNonograms.MAIN, (0, 0), KBlock.EMPTY, KBlock.FILLED)
+    _t0 = time.perf_counter()
+    for _ in range(repeat):
+        nng.undo()
+        nng.redo()
+    _move = (time.perf_counter() - _t0) / (2*repeat)
+    return {'moves': num_moves, 'undo_reset': _reset, 'undo_move': _move}
+
+
+def bench_undo_chain(
+    screen:pygame.Surface,
+    num_moves:int,
+    reset_every:int = 1000
+    ) -> Dict[str, float]:
+    nng = make_nonograms(screen)
+    fill_history(nng, num_moves, reset_every)
+    _steps = len(nng.history)
+    _undo = timed(lambda: [nng.undo() for _ in range(_steps)])
+    _redo = timed(lambda: [nng.redo() for _ in range(_steps)])
+    KObject.pop_dirty()
+    return {
+        'moves': num_moves,
+        'reset_every': reset_every,
+        'undo_all': _undo['best'],
+        'redo_all': _redo['best'],
+        'per_step': (_undo['best'] + _redo['best']) / (2*_steps)
+    }
+
+
+def bench_construct(screen:pygame.Surface, size:int) -> Dict[str, float]:
+    _rss = rss()
+    _t0 = time.perf_counter()
+    nng = make_board(screen, size)
+    _time = time.perf_counter() - _t0
+    result = {'size': size, 'construct': _time, 'rss': rss() - _rss}
+    del nng
+    return result
+
+
+def bench_register(
+    screen:pygame.Surface,
+    name:str,
+    size:int,
+    puzzle:KType.Puzzle,
+    repeat:int
+    ) -> Dict[str, float]:
+    _boards = [
+        make_board(screen, size, puzzle, VIEW_SIZE) for _ in range(repeat)
+    ]
+    _t0 = time.perf_counter()
+    for nng in _boards:
+        nng.register(puzzle)
+    _time = (time.perf_counter() - _t0) / repeat
+    return {'puzzle': name, 'size': size, 'register': _time}
+
+
+def bench_draw_all(
+    screen:pygame.Surface,
+    size:int,
+    repeat:int
+    ) -> Dict[str, float]:
+    puzzle = make_puzzle(size)
+    result = {'size': size}
+    for mode, view_size in (('full', None), ('view', VIEW_SIZE)):
+        nng = make_board(screen, size, puzzle, view_size)
+        nng.register(puzzle)
+        nng.draw_all()
+        result[mode] = timed(nng.draw_all, repeat)['mean']
+        KObject.pop_dirty()
+    return result
+
+
+def bench_clicks(
+    screen:pygame.Surface,
+    num_clicks:int,
+    view_size:Union[Tuple[int, int], None] = None,
+    size:int = 25
+    ) -> Dict[str, float]:
+    if size == 25 and view_size is None:
+        nng = make_nonograms(screen)
+    else:
+        puzzle = make_puzzle(size)
+        nng = make_board(screen, size, puzzle, view_size)
+        nng.register(puzzle)
+        nng.draw_all()
+    _rect = nng.rect
+    _positions = [
+        (
+            random.randrange(_rect.left, _rect.right),
+            random.randrange(_rect.top, _rect.bottom)
+        ) for _ in range(num_clicks)
+    ]
+    KNonograms.CURRENT_MODE = KBlock.FILLED
+    _hits = 0
+    _t0 = time.perf_counter()
+    for position in _positions:
+        _hits += nng.check(position)
+        if len(KObject.DIRTY) > 1024:
+            KObject.pop_dirty()
+    _time = time.perf_counter() - _t0
+    KNonograms.CURRENT_MODE = KBlock.EMPTY
+    KObject.pop_dirty()
+    return {
+        'size': size,
+        'view': view_size is not None,
+        'clicks': num_clicks,
+        'hits': _hits,
+        'total': _time,
+        'per_click': _time / num_clicks
+    }
+
+
+def bench_gif(
+    screen:pygame.Surface,
+    num_frames:int,
+    size:Tuple[int, int],
+    repeat:int
+    ) -> Dict[str, float]:
+    _rng = numpy.random.default_rng(0)
+    _frames = [
+        Image.fromarray(
+            _rng.integers(0, 256, (size[1], size[0], 3), numpy.uint8)
+        ) for _ in range(num_frames)
+    ]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fpath = os.path.join(tmpdir, "bench.gif")
+        _frames[0].save(
+            fpath, save_all=True, append_images=_frames[1:], duration=50
+        )
+        result = timed(lambda: KGIF(screen, (0, 0), fpath), repeat)
+        _first, _stream = list(), list()
+        for _ in range(repeat):
+            _t0 = time.perf_counter()
+            gif = KGIF(screen, (0, 0), fpath, stream=True)
+            _first.append(time.perf_counter() - _t0)
+            while not gif.is_loaded():
+                gif.pump()
+                time.sleep(0.001)
+            _stream.append(time.perf_counter() - _t0)
+    return {
+        'frames': num_frames,
+        'width': size[0],
+        'height': size[1],
+        'load': result['mean'],
+        'stream_first_frame': sum(_first) / repeat,
+        'stream_load': sum(_stream) / repeat
+    }
+
+
+def bench_save(
+    screen:pygame.Surface,
+    size:int,
+    num_moves:int,
+    repeat:int
+    ) -> Dict[str, float]:
+    puzzle = make_puzzle(size)
+    nng = make_board(screen, size, puzzle, VIEW_SIZE)
+    nng.register(puzzle)
+    fill_history(nng, num_moves, 1000)
+    resumed = make_board(screen, size, puzzle, VIEW_SIZE)
+    resumed.register(puzzle)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fpath = os.path.join(tmpdir, "bench.sav")
+        _save = timed(lambda: KSaveFile.save(fpath, nng), repeat)
+        _load = timed(lambda: KSaveFile.load(fpath, resumed), repeat)
+        _bytes = os.path.getsize(fpath)
+    KObject.pop_dirty()
+    return {
+        'size': size,
+        'moves': num_moves,
+        'bytes': _bytes,
+        'save': _save['mean'],
+        'load': _load['mean']
+    }
+
+
+def bench_journal(
+    screen:pygame.Surface,
+    num_clicks:int,
+    size:int = 100
+    ) -> Dict[str, float]:
+    puzzle = make_puzzle(size)
+    _cells = [
+        (random.randrange(size), random.randrange(size))
+        for _ in range(num_clicks)
+    ]
+    KNonograms.CURRENT_MODE = KBlock.FILLED
+    result = {'size': size, 'clicks': num_clicks}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fpath = os.path.join(tmpdir, "bench.wal")
+        for mode in ('plain', 'journal'):
+            nng = make_board(screen, size, puzzle, VIEW_SIZE)
+            nng.register(puzzle)
+            journal = KJournal(fpath, compact_every=num_clicks+1)
+            if mode == 'journal':
+                journal.attach(nng)
+            _t0 = time.perf_counter()
+            for ind in _cells:
+                nng.click(KNonograms.MAIN, ind)
+            result[mode] = (time.perf_counter() - _t0) / num_clicks
+            journal.close()
+            KObject.pop_dirty()
+        resumed = make_board(screen, size, puzzle, VIEW_SIZE)
+        resumed.register(puzzle)
+        journal = KJournal(fpath)
+        _t0 = time.perf_counter()
+        result['replayed'] = journal.attach(resumed)
+        result['replay'] = time.perf_counter() - _t0
+        journal.close()
+    KNonograms.CURRENT_MODE = KBlock.EMPTY
+    KObject.pop_dirty()
+    return result
+
+
+def bench_catalog(num_puzzles:int, repeat:int) -> Dict[str, float]:
+    _sizes = (10, 15, 20, 25)
+    puzzles = [
+        (f"random{i}", make_puzzle(_sizes[i % 4], i, 1 + i % 5))
+        for i in range(num_puzzles)
+    ]
+    _ids = [random.randrange(num_puzzles) for _ in range(1000)]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fpath = os.path.join(tmpdir, "bench.kcat")
+        _t0 = time.perf_counter()
+        KCatalog.write(fpath, puzzles)
+        _build = time.perf_counter() - _t0
+        _open = timed(lambda: KCatalog(fpath).close(), repeat)
+        catalog = KCatalog(fpath)
+        _filter = timed(
+            lambda: catalog.filter(width=20, height=20, max_difficulty=0.1),
+            repeat
+        )
+        _t0 = time.perf_counter()
+        for pid in _ids:
+            catalog.load(pid)
+        _load = (time.perf_counter() - _t0) / len(_ids)
+        catalog.close()
+        _bytes = os.path.getsize(fpath)
+    return {
+        'puzzles': num_puzzles,
+        'bytes': _bytes,
+        'build': _build,
+        'open': _open['mean'],
+        'filter': _filter['mean'],
+        'load': _load
+    }
+
+
+def run(quick:bool = False) -> Dict:
+    pygame.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode(VIEW_SIZE)
+    random.seed(0)
+    _repeat = 2 if quick else 10
+    results = dict()
+    results['construct'] = [bench_construct(screen, size) for size in SIZES]
+    results['register'] = [
+        bench_register(screen, "PUZZLE01", 25, ____PUZZLE01____, _repeat)
+    ] + [
+        bench_register(
+            screen, f"generated{size}", size, make_puzzle(size), _repeat
+        ) for size in SIZES[1:]
+    ]
+    results['draw_all'] = [
+        bench_draw_all(screen, size, _repeat) for size in SIZES
+    ]
+    results['clicks'] = [
+        bench_clicks(screen, 10000),
+        bench_clicks(screen, 10000, VIEW_SIZE, SIZES[-1])
+    ]
+    _moves = (1000, 10000) if quick else (1000, 10000, 100000)
+    results['undo'] = [bench_undo(screen, num_moves) for num_moves in _moves]
+    results['undo_chain'] = [
+        bench_undo_chain(screen, num_moves) for num_moves in _moves[:2]
+    ]
+    results['save'] = [
+        bench_save(screen, 100, 10000 if quick else 50000, _repeat)
+    ]
+    results['journal'] = [bench_journal(screen, 2000 if quick else 20000)]
+    results['catalog'] = [bench_catalog(500 if quick else 5000, _repeat)]
+    results['gif'] = [bench_gif(screen, 30, (100, 100), _repeat)]
+    pygame.quit()
+    return {
+        'version': __version__,
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'numpy': numpy.__version__,
+        'platform': platform.platform(),
+        'video_driver': os.environ.get('SDL_VIDEODRIVER'),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'unit': 'seconds',
+        'results': results
+    }
+
+
+def main(argv:Union[List[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Headless benchmarks for Nonograms, written as JSON."
+    )
+    parser.add_argument(
+        '-o', '--output', default=None,
+        help="file to write the JSON report to (default: stdout)"
+    )
+    parser.add_argument(
+        '--quick', action='store_true',
+        help="fewer repeats and shorter histories"
+    )
+    args = parser.parse_args(argv)
+    report = run(args.quick)
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import argparse
+import numpy
+from typing import TYPE_CHECKING, BinaryIO, Iterable, List, Tuple, Union
+
+from kfiles import KFile
+from kverifiers import KVerifier
+from ksolvers import KSolver, KContradiction
+
+if TYPE_CHECKING:
+    from kauxiliaries import KType
+
+CATALOG_PATH = "puzzles.kcat"
+
+
+class KCatalog():
+    # | header | index | bodies |. The index is one fixed-size record per
+    # puzzle, read straight out of the mapping as a numpy array, so listing
+    # and filtering never touch a body. A body is little-endian uint16:
+    # | column counts | row counts | column clues | row clues |.
+    MAGIC = b'KNGCAT01'
+    VERSION = 1
+    ALIGN = 8
+    HEADER = struct.Struct('<8sII')
+    ENTRY = numpy.dtype([
+        ('offset', '<u8'),
+        ('length', '<u4'),
+        ('width', '<u2'),
+        ('height', '<u2'),
+        ('difficulty', '<f4'),
+        ('digest', 'S32'),
+        ('name', 'S32')
+    ])
+    NAME_SIZE = 32
+    UNSOLVABLE = -1.0
+
+    def __init__(self, fpath:str):
+        self.fpath = fpath
+        with open(fpath, 'rb') as source:
+            self.buffer = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, count = KCatalog.HEADER.unpack_from(self.buffer)
+            if magic != KCatalog.MAGIC or version != KCatalog.VERSION:
+                raise ValueError(f"{fpath} is not a Nonograms catalog")
+            self.index = numpy.frombuffer(
+                self.buffer,
+                KCatalog.ENTRY,
+                count,
+                KCatalog.aligned(KCatalog.HEADER.size)
+            )
+        except struct.error as error:
+            self.buffer.close()
+            raise ValueError(f"{fpath} is truncated") from error
+        except ValueError:
+            self.buffer.close()
+            raise
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @staticmethod
+    def aligned(offset:int) -> int:
+        return -(-offset//KCatalog.ALIGN) * KCatalog.ALIGN
+
+    def name(self, pid:int) -> str:
+        return self.index['name'][pid].decode('utf-8', 'replace')
+
+    def size(self, pid:int) -> Tuple[int, int]:
+        return int(self.index['width'][pid]), int(self.index['height'][pid])
+
+    def difficulty(self, pid:int) -> float:
+        return float(self.index['difficulty'][pid])
+
+    def sizes(self) -> List[Tuple[int, int]]:
+        _sizes = numpy.unique(self.index[['width', 'height']])
+        return [(int(w), int(h)) for w, h in _sizes.tolist()]
+
+    def filter(
+        self,
+        width:Union[int, None] = None,
+        height:Union[int, None] = None,
+        min_difficulty:Union[float, None] = None,
+        max_difficulty:Union[float, None] = None
+        ) -> numpy.ndarray:
+        index = self.index
+        mask = numpy.ones(len(index), bool)
+        if width is not None:
+            mask &= index['width'] == width
+        if height is not None:
+            mask &= index['height'] == height
+        if min_difficulty is not None:
+            mask &= index['difficulty'] >= min_difficulty
+        if max_difficulty is not None:
+            mask &= index['difficulty'] <= max_difficulty
+        return numpy.flatnonzero(mask)
+
+    def find(self, digest:bytes) -> Union[int, None]:
+        _ids = numpy.flatnonzero(self.index['digest'] == digest)
+        return int(_ids[0]) if _ids.size else None
+
+    def load(self, pid:int) -> "KType.Puzzle":
+        if not 0 <= pid < len(self.index):
+            raise IndexError(f"no puzzle #{pid} in {self.fpath}")
+        entry = self.index[pid]
+        return KCatalog.decode(
+            numpy.frombuffer(
+                self.buffer, '<u2', int(entry['length'])//2, int(entry['offset'])
+            ),
+            int(entry['width']),
+            int(entry['height'])
+        )
+
+    def close(self) -> None:
+        # The index is a view of the mapping and has to go first.
+        self.index = self.index[:0].copy()
+        self.buffer.close()
+
+    @staticmethod
+    def encode(puzzle:"KType.Puzzle") -> Tuple[bytes, int, int]:
+        hdict, vdict = puzzle
+        _width = max(hdict, default=-1) + 1
+        _height = max(vdict, default=-1) + 1
+        _cols = [
+            [num for num in hdict.get(i, []) if num > 0] for i in range(_width)
+        ]
+        _rows = [
+            [num for num in vdict.get(i, []) if num > 0] for i in range(_height)
+        ]
+        _body = [len(nlist) for nlist in _cols + _rows]
+        for nlist in _cols + _rows:
+            _body += nlist
+        return numpy.array(_body, '<u2').tobytes(), _width, _height
+
+    @staticmethod
+    def decode(body:numpy.ndarray, width:int, height:int) -> "KType.Puzzle":
+        _counts = body[:width+height].tolist()
+        _clues = body[width+height:].tolist()
+        _lines = list()
+        _pos = 0
+        for count in _counts:
+            # Empty lines come back as [0], the way kpuzzles writes them.
+            _lines.append(_clues[_pos:_pos+count] or [0])
+            _pos += count
+        hdict = dict(enumerate(_lines[:width]))
+        vdict = dict(enumerate(_lines[width:]))
+        return hdict, vdict
+
+    @staticmethod
+    def rate(puzzle:"KType.Puzzle") -> float:
+        # Share of the cells line logic alone cannot decide: 0 for puzzles
+        # that need no guessing, UNSOLVABLE for contradictory clues.
+        solver = KSolver(puzzle)
+        _cells = solver.width * solver.height
+        if not _cells:
+            return 0.0
+        try:
+            solver.propagate()
+        except KContradiction:
+            return KCatalog.UNSOLVABLE
+        return 1 - solver.num_decided() / _cells
+
+    @staticmethod
+    def write(
+        fpath:str,
+        puzzles:Iterable[Tuple[str, "KType.Puzzle"]]
+        ) -> int:
+        _bodies = list()
+        _entries = list()
+        for name, puzzle in puzzles:
+            body, width, height = KCatalog.encode(puzzle)
+            _bodies.append(body)
+            _entries.append((
+                0,
+                len(body),
+                width,
+                height,
+                KCatalog.rate(puzzle),
+                KVerifier(puzzle).digest(),
+                name.encode('utf-8')[:KCatalog.NAME_SIZE]
+            ))
+        index = numpy.array(_entries, KCatalog.ENTRY)
+        _offset = KCatalog.aligned(KCatalog.HEADER.size) + index.nbytes
+        for i, body in enumerate(_bodies):
+            _offset = KCatalog.aligned(_offset)
+            index['offset'][i] = _offset
+            _offset += len(body)
+
+        def _write(output:BinaryIO) -> None:
+            output.write(KCatalog.HEADER.pack(
+                KCatalog.MAGIC, KCatalog.VERSION, len(index)
+            ))
+            KCatalog.pad(output)
+            output.write(index.tobytes())
+            for body in _bodies:
+                KCatalog.pad(output)
+                output.write(body)
+
+        KFile.write_atomic(fpath, _write)
+        return len(index)
+
+    @staticmethod
+    def pad(output:BinaryIO) -> None:
+        output.write(b'\0' * (KCatalog.aligned(output.tell())-output.tell()))
+
+
+def make_puzzle(size:int, seed:int = 0, block:int = 5) -> "KType.Puzzle":
+    # Blocky random pictures give clue counts close to real puzzles.
+    _rng = numpy.random.default_rng(seed)
+    _cells = -(-size//block)
+    _image = numpy.kron(
+        _rng.random((_cells, _cells)) < 0.5,
+        numpy.ones((block, block), bool)
+    )[:size, :size].astype(numpy.uint8)
+    hdict = {
+        xi: list(KVerifier.line_runs(_image[xi, :])) or [0]
+        for xi in range(size)
+    }
+    vdict = {
+        yi: list(KVerifier.line_runs(_image[:, yi])) or [0]
+        for yi in range(size)
+    }
+    return hdict, vdict
+
+
+def builtin_puzzles() -> List[Tuple[str, "KType.Puzzle"]]:
+    import kpuzzles
+    return [
+        (name.strip('_'), puzzle) for name, puzzle in vars(kpuzzles).items()
+        if name.startswith('____PUZZLE') and name.endswith('____')
+    ]
+
+
+def build(
+    fpath:str = CATALOG_PATH,
+    num_generated:int = 0,
+    sizes:Tuple[int, ...] = (10, 15, 20, 25),
+    seed:int = 0
+    ) -> dict:
+    puzzles = builtin_puzzles()
+    if num_generated:
+        for i in range(num_generated):
+            size = sizes[i % len(sizes)]
+            puzzles.append((
+                f"random{size}-{seed+i}", make_puzzle(size, seed+i, 1 + i % 5)
+            ))
+    return {
+        'puzzles': KCatalog.write(fpath, puzzles),
+        'bytes': os.path.getsize(fpath)
+    }
+
+
+def main(argv:Union[List[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Build the indexed Nonograms puzzle catalog."
+    )
+    parser.add_argument(
+        '-o', '--output', default=CATALOG_PATH,
+        help=f"catalog file to write (default: {CATALOG_PATH})"
+    )
+    parser.add_argument(
+        '--generate', type=int, default=0, metavar='N',
+        help="also add N random puzzles after the ones in kpuzzles.py"
+    )
+    parser.add_argument(
+        '--sizes', default="10,15,20,25", metavar='S,S,...',
+        help="square sizes the random puzzles cycle through"
+    )
+    parser.add_argument(
+        '--seed', type=int, default=0,
+        help="seed of the first random puzzle"
+    )
+    args = parser.parse_args(argv)
+    json.dump(
+        build(
+            args.output,
+            args.generate,
+            tuple(int(size) for size in args.sizes.split(',')),
+            args.seed
+        ),
+        sys.stdout
+    )
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+import os
+from typing import BinaryIO, Callable
+
+
+class KFile():
+    @staticmethod
+    def write_atomic(fpath:str, write:Callable[[BinaryIO], None]) -> int:
+        # Written next to the target, synced and renamed over it, so a crash
+        # mid-write leaves the previous file intact.
+        _tmp = f"{fpath}.tmp"
+        try:
+            with open(_tmp, 'wb') as output:
+                write(output)
+                output.flush()
+                os.fsync(output.fileno())
+            os.replace(_tmp, fpath)
+        except BaseException:
+            if os.path.exists(_tmp):
+                os.remove(_tmp)
+            raise
+        return os.path.getsize(fpath)
@@ -0,0 +1,149 @@
+import numpy
+
+from array import array
+from typing import Dict, List, Tuple, Union
+
+
+class KCheckpoint():
+    def __init__(self, states:Dict[int, numpy.ndarray]):
+        self.cells = dict()
+        for key, _states in states.items():
+            _flat = _states.ravel()
+            _where = numpy.flatnonzero(_flat)
+            self.cells[key] = (_where.astype(numpy.uint32), _flat[_where])
+
+    @classmethod
+    def from_cells(
+        cls,
+        cells:Dict[int, Tuple[numpy.ndarray, numpy.ndarray]]
+        ) -> "KCheckpoint":
+        checkpoint = cls.__new__(cls)
+        checkpoint.cells = cells
+        return checkpoint
+
+    def restore(self, states:Dict[int, numpy.ndarray]) -> None:
+        for key, (where, values) in self.cells.items():
+            _flat = states[key].reshape(-1)
+            _flat.fill(0)
+            _flat[where] = values
+
+
+class KHistory():
+    MOVE = 0
+    RESET = 1
+
+    # One 32-bit word per cell change: | key:2 | x:12 | y:12 | old:3 | new:3 |
+    # A reset uses key 3 (never a playable grid) and keeps the index of
+    # its checkpoint in the low 24 bits. A step (one click, one stroke or
+    # one reset) covers the words from bounds[i] up to bounds[i+1].
+    KEY_RESET = 3
+    MAX_INDEX = (1 << 12) - 1
+    MAX_STATE = (1 << 3) - 1
+    MAX_CHECKPOINT = (1 << 24) - 1
+
+    def __init__(self):
+        self.words = array('I')
+        self.bounds = array('I', [0])
+        self.checkpoints = list()
+        self.pih = -1
+        self.journal = None
+
+    def __len__(self) -> int:
+        return len(self.bounds) - 1
+
+    @staticmethod
+    def pack(key:int, xi:int, yi:int, old:int, new:int) -> int:
+        if max(xi, yi) > KHistory.MAX_INDEX or min(xi, yi) < 0:
+            raise ValueError("cell index does not fit in a history word")
+        if max(old, new) > KHistory.MAX_STATE or min(old, new) < 0:
+            raise ValueError("cell state does not fit in a history word")
+        return key << 30 | xi << 18 | yi << 6 | old << 3 | new
+
+    def unpack(self, word:int) -> Tuple:
+        key = word >> 30
+        if key == KHistory.KEY_RESET:
+            return (
+                KHistory.RESET,
+                self.checkpoints[word & KHistory.MAX_CHECKPOINT]
+            )
+        return (
+            KHistory.MOVE,
+            key,
+            (word >> 18 & KHistory.MAX_INDEX, word >> 6 & KHistory.MAX_INDEX),
+            word >> 3 & KHistory.MAX_STATE,
+            word & KHistory.MAX_STATE
+        )
+
+    def truncate(self) -> None:
+        _step = self.pih + 1
+        if _step >= len(self):
+            return
+        _start = self.bounds[_step]
+        for word in self.words[_start:]:
+            if word >> 30 == KHistory.KEY_RESET:
+                del self.checkpoints[word & KHistory.MAX_CHECKPOINT:]
+                break
+        del self.words[_start:]
+        del self.bounds[_step+1:]
+
+    def push_words(self, words:List[int]) -> None:
+        if not words:
+            return
+        self.truncate()
+        self.words.extend(words)
+        self.bounds.append(len(self.words))
+        self.pih += 1
+        if self.journal is not None:
+            self.journal.log_step(words)
+
+    def push_move(
+        self,
+        key:int,
+        ind:Tuple[int, int],
+        old:int,
+        new:int
+        ) -> None:
+        self.push_words([KHistory.pack(key, *ind, old, new)])
+
+    def push_stroke(
+        self,
+        key:int,
+        moves:List[Tuple[Tuple[int, int], int, int]]
+        ) -> None:
+        self.push_words([
+            KHistory.pack(key, *ind, old, new) for ind, old, new in moves
+        ])
+
+    def push_reset(self, states:Dict[int, numpy.ndarray]) -> None:
+        if len(self.checkpoints) > KHistory.MAX_CHECKPOINT:
+            raise ValueError("too many resets for one history")
+        self.truncate()
+        self.words.append(KHistory.KEY_RESET << 30 | len(self.checkpoints))
+        self.bounds.append(len(self.words))
+        self.checkpoints.append(KCheckpoint(states))
+        self.pih += 1
+        if self.journal is not None:
+            self.journal.log_reset()
+
+    def step(self, i:int) -> List[Tuple]:
+        return [
+            self.unpack(word)
+            for word in self.words[self.bounds[i]:self.bounds[i+1]]
+        ]
+
+    def undo(self) -> Union[List[Tuple], None]:
+        if self.pih < 0:
+            return None
+        entries = self.step(self.pih)
+        self.pih -= 1
+        if self.journal is not None:
+            self.journal.log_undo()
+        return entries[::-1]
+
+    def redo(self) -> Union[List[Tuple], None]:
+        if self.pih+1 >= len(self):
+            return None
+        self.pih += 1
+        if self.journal is not None:
+            self.journal.log_redo()
+        return self.step(self.pih)
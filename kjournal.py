@@ -0,0 +1,255 @@
+import io
+import os
+import mmap
+import zlib
+import struct
+import numpy
+import threading
+from array import array
+from typing import TYPE_CHECKING, Dict
+
+from kfiles import KFile
+from khistory import KHistory
+from ksaves import KSaveFile
+
+if TYPE_CHECKING:
+    from knonograms import KNonograms
+
+JOURNAL_PATH = "nonograms.wal"
+
+
+class KJournal():
+    # | header | snapshot | records |. The snapshot is a KSaveFile image
+    # of the board and history when the journal was last compacted. A
+    # record is | op:8 count:24 | crc32 | count history words |, the crc
+    # covering the first word and the words. Replay stops at the first
+    # torn or corrupt record and cuts the file there.
+    MAGIC = b'KNGJRNL1'
+    VERSION = 1
+    HEADER = struct.Struct('<8sIxxxxQQ')
+    RECORD = struct.Struct('<II')
+    MAX_COUNT = (1 << 24) - 1
+    STEP = 0
+    RESET = 1
+    UNDO = 2
+    REDO = 3
+    INTERVAL = 0.05
+    COMPACT_EVERY = 4096
+
+    def __init__(
+        self,
+        fpath:str,
+        interval:float = INTERVAL,
+        compact_every:int = COMPACT_EVERY
+        ):
+        self.fpath = fpath
+        self.interval = interval
+        self.compact_every = compact_every
+        self.nng = None
+        self.output = None
+        self.pending = bytearray()
+        self.snapshot = None
+        self.num_records = 0
+        self.lock = threading.Lock()
+        self.io_lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.writer = None
+
+    def _log(self, op:int, payload:bytes = b'') -> None:
+        _head = op << 24 | len(payload) >> 2
+        _crc = zlib.crc32(payload, zlib.crc32(_head.to_bytes(4, 'little')))
+        with self.lock:
+            self.pending += KJournal.RECORD.pack(_head, _crc)
+            self.pending += payload
+            self.num_records += 1
+
+    def log_step(self, words:array) -> None:
+        if len(words) > KJournal.MAX_COUNT:
+            raise ValueError("too many cell changes for one journal record")
+        self._log(KJournal.STEP, KSaveFile.words(array('I', words)))
+
+    def log_reset(self) -> None:
+        self._log(KJournal.RESET)
+
+    def log_undo(self) -> None:
+        self._log(KJournal.UNDO)
+
+    def log_redo(self) -> None:
+        self._log(KJournal.REDO)
+
+    def is_due(self) -> bool:
+        return self.num_records >= self.compact_every
+
+    def attach(self, nng:"KNonograms", redraw:bool = True) -> int:
+        self.nng = nng
+        try:
+            replayed = self._restore(redraw)
+        except (OSError, ValueError):
+            # Missing, foreign or unreadable: start over from the board.
+            replayed = 0
+            self.compact()
+        nng.history.journal = self
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._write_all, daemon=True)
+            self.writer.start()
+        return replayed
+
+    @staticmethod
+    def digest(fpath:str) -> bytes:
+        with open(fpath, 'rb') as source:
+            _header = source.read(KJournal.HEADER.size)
+        try:
+            magic, version, start, _ = KJournal.HEADER.unpack(_header)
+        except struct.error as error:
+            raise ValueError(f"{fpath} is truncated") from error
+        if magic != KJournal.MAGIC or version != KJournal.VERSION:
+            raise ValueError("not a Nonograms journal")
+        return KSaveFile.digest(fpath, start)
+
+    def _restore(self, redraw:bool) -> int:
+        nng = self.nng
+        with open(self.fpath, 'rb') as source:
+            buffer = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, start, end = KJournal.HEADER.unpack_from(buffer)
+            if magic != KJournal.MAGIC or version != KJournal.VERSION:
+                raise ValueError("not a Nonograms journal")
+            history, _states = KSaveFile.read(buffer, nng, start)
+            states = {key: states.copy() for key, states in _states.items()}
+            _states = None
+            _pos, _size = end, len(buffer)
+            replayed = 0
+            while _pos + KJournal.RECORD.size <= _size:
+                head, crc = KJournal.RECORD.unpack_from(buffer, _pos)
+                _words = _pos + KJournal.RECORD.size
+                _end = _words + 4*(head & KJournal.MAX_COUNT)
+                if _end > _size or crc != zlib.crc32(
+                    buffer[_words:_end], zlib.crc32(buffer[_pos:_words-4])
+                ):
+                    break
+                KJournal.replay(
+                    history,
+                    states,
+                    head >> 24,
+                    KSaveFile.read_words(
+                        buffer, _words, head & KJournal.MAX_COUNT
+                    )
+                )
+                _pos = _end
+                replayed += 1
+        except struct.error as error:
+            raise ValueError("the journal is truncated") from error
+        finally:
+            _states = None
+            buffer.close()
+        if _pos < _size:
+            os.truncate(self.fpath, _pos)
+        nng.end_stroke()
+        nng.history = history
+        nng.import_states(states, redraw)
+        self.num_records = replayed
+        self.output = open(self.fpath, 'ab')
+        return replayed
+
+    @staticmethod
+    def apply(
+        states:Dict[int, numpy.ndarray],
+        words:array,
+        is_undo:bool
+        ) -> None:
+        for word in (reversed(words) if is_undo else words):
+            states[word >> 30][
+                word >> 18 & KHistory.MAX_INDEX, word >> 6 & KHistory.MAX_INDEX
+            ] = word >> 3 & KHistory.MAX_STATE if is_undo \
+                else word & KHistory.MAX_STATE
+
+    @staticmethod
+    def replay(
+        history:KHistory,
+        states:Dict[int, numpy.ndarray],
+        op:int,
+        words:array
+        ) -> None:
+        if op == KJournal.STEP:
+            history.push_words(words)
+            KJournal.apply(states, words, False)
+        elif op == KJournal.RESET:
+            history.push_reset(states)
+            for _states in states.values():
+                _states.fill(0)
+        elif op == KJournal.UNDO and history.pih >= 0:
+            _words = history.words[
+                history.bounds[history.pih]:history.bounds[history.pih+1]
+            ]
+            history.pih -= 1
+            if _words[0] >> 30 == KHistory.KEY_RESET:
+                history.checkpoints[_words[0] & KHistory.MAX_CHECKPOINT] \
+                    .restore(states)
+            else:
+                KJournal.apply(states, _words, True)
+        elif op == KJournal.REDO and history.pih+1 < len(history):
+            history.pih += 1
+            _words = history.words[
+                history.bounds[history.pih]:history.bounds[history.pih+1]
+            ]
+            if _words[0] >> 30 == KHistory.KEY_RESET:
+                for _states in states.values():
+                    _states.fill(0)
+            else:
+                KJournal.apply(states, _words, False)
+
+    def compact(self) -> None:
+        # Serialised on the caller's thread, where the board is consistent;
+        # the writer thread puts it on disk.
+        _output = io.BytesIO()
+        _output.write(KJournal.HEADER.pack(KJournal.MAGIC, 0, 0, 0))
+        _start = KSaveFile.aligned(_output.tell())
+        KSaveFile.write(_output, self.nng)
+        _end = _output.tell()
+        _output.seek(0)
+        _output.write(KJournal.HEADER.pack(
+            KJournal.MAGIC, KJournal.VERSION, _start, _end
+        ))
+        with self.lock:
+            # Everything still pending is already part of the snapshot.
+            self.pending.clear()
+            self.num_records = 0
+            self.snapshot = _output.getvalue()
+
+    def _write_snapshot(self, snapshot:bytes) -> None:
+        if self.output is not None:
+            self.output.close()
+        KFile.write_atomic(self.fpath, lambda output: output.write(snapshot))
+        self.output = open(self.fpath, 'ab')
+
+    def flush(self) -> None:
+        with self.io_lock:
+            with self.lock:
+                snapshot, self.snapshot = self.snapshot, None
+                data = bytes(self.pending)
+                self.pending.clear()
+            if snapshot is not None:
+                self._write_snapshot(snapshot)
+            if not data:
+                return
+            self.output.write(data)
+            self.output.flush()
+            os.fsync(self.output.fileno())
+
+    def _write_all(self) -> None:
+        while not self.stopping.wait(self.interval):
+            self.flush()
+        self.flush()
+
+    def close(self) -> None:
+        self.stopping.set()
+        if self.writer is not None:
+            self.writer.join()
+            self.writer = None
+        else:
+            self.flush()
+        if self.output is not None:
+            self.output.close()
+            self.output = None
+        if self.nng is not None and self.nng.history.journal is self:
+            self.nng.history.journal = None
@@ -1,8 +1,143 @@
+import time
+_T_START = time.perf_counter()
+
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import gc
+import sys
+import json
+import argparse
+import contextlib
+from typing import Dict, Union
+
 from kwindows import KWindow
+from kassets import ASSET_PATH
+from ksaves import SAVE_PATH
+from kjournal import JOURNAL_PATH
+from kcatalog import CATALOG_PATH
+
+PROFILE_PATH = "nonograms_profile"
+
+
+def startup_bench(
+    asset_path:Union[str, None],
+    fast_start:bool = False,
+    page:str = "start_menu",
+    save_path:Union[str, None] = SAVE_PATH
+    ) -> Dict:
+    _t_import = time.perf_counter()
+    result = {'fast_start': fast_start, 'page': page, 'unit': 'seconds'}
+    result['import'] = _t_import - _T_START
+    # The intro runs for as long as its music, so it is never timed.
+    window = KWindow(
+        current_page = page,
+        asset_path = asset_path,
+        fast_start = True,
+        save_path = save_path
+    )
+    _t = time.perf_counter()
+    result['window'] = _t - _t_import
+    result['asset_pack'] = None if window.assets is None else asset_path
+    result['opening_first_frame'] = result['opening_loaded'] = None
+    try:
+        gif = None if fast_start else window.load_opening_gif()
+    except FileNotFoundError:
+        gif = None
+    if gif is not None:
+        result['opening_first_frame'] = time.perf_counter() - _t
+        while not gif.is_loaded():
+            gif.pump()
+            time.sleep(0.001)
+        gif.close()
+        result['opening_loaded'] = time.perf_counter() - _t
+    _t = time.perf_counter()
+    target = window.pages[page]
+    target.build()
+    target.add_hits()
+    target.is_built = True
+    target.enter()
+    window.update_display()
+    _t_ready = time.perf_counter()
+    result['page_ready'] = _t_ready - _t
+    result['time_to_interactive'] = _t_ready - _T_START
+    result['pil_imported'] = 'PIL' in sys.modules
+    return result
 
 
 def main():
-    KWindow().run()
+    parser = argparse.ArgumentParser(description="Nonograms")
+    parser.add_argument(
+        '--profile', nargs='?', const=PROFILE_PATH, default=None,
+        metavar='PATH',
+        help="record frame and click timings, written to PATH.csv and "
+            "PATH.json on exit (press F3 in game for the overlay)"
+    )
+    parser.add_argument(
+        '--assets', default=ASSET_PATH, metavar='PATH',
+        help=f"asset pack built by kassets.py (default: {ASSET_PATH})"
+    )
+    parser.add_argument(
+        '--no-assets', action='store_true',
+        help="ignore the asset pack and load everything from the sources"
+    )
+    parser.add_argument(
+        '--save', default=SAVE_PATH, metavar='PATH',
+        help=f"game in progress, resumed and saved there (default: {SAVE_PATH})"
+    )
+    parser.add_argument(
+        '--no-save', action='store_true',
+        help="neither resume nor save the game in progress"
+    )
+    parser.add_argument(
+        '--journal', nargs='?', const=JOURNAL_PATH, default=None,
+        metavar='PATH',
+        help="log every move to a crash-safe journal and replay it on the "
+            f"next launch (default PATH: {JOURNAL_PATH})"
+    )
+    parser.add_argument(
+        '--catalog', default=CATALOG_PATH, metavar='PATH',
+        help="puzzle catalog built by kcatalog.py, listed on the Import "
+            f"Game page (default: {CATALOG_PATH})"
+    )
+    parser.add_argument(
+        '--fast', action='store_true',
+        help="skip the opening animation, the menu intro and the closing "
+            "music (a key press or click also skips them)"
+    )
+    parser.add_argument(
+        '--page', default="start_menu", metavar='NAME',
+        help="page to open first, e.g. start_game (default: start_menu)"
+    )
+    parser.add_argument(
+        '--startup-bench', action='store_true',
+        help="time startup up to the first interactive menu frame and "
+            "print it as JSON"
+    )
+    args = parser.parse_args()
+    _assets = None if args.no_assets else args.assets
+    if args.startup_bench:
+        # Only the report goes to stdout; the window's greetings do not.
+        with contextlib.redirect_stdout(sys.stderr):
+            result = startup_bench(
+                _assets,
+                args.fast,
+                args.page,
+                None if args.no_save else args.save
+            )
+            gc.collect()
+        json.dump(result, sys.stdout, indent = 2)
+        sys.stdout.write('\n')
+        return
+    KWindow(
+        current_page = args.page,
+        profile_path = args.profile,
+        asset_path = _assets,
+        fast_start = args.fast,
+        save_path = None if args.no_save else args.save,
+        journal_path = args.journal,
+        catalog_path = args.catalog
+    ).run()
 
 
 if __name__ == '__main__':
@@ -1,9 +1,12 @@
 import pygame
+import numpy
 
-from typing import Tuple
+from typing import Tuple, Dict, List, Iterable, Union
 
 from kauxiliaries import KType, KColor
-from kobjects import KObject, KBlock, KTextBlock, KGrid
+from kobjects import KObject, KBlock, KTextBlock, KGrid, KHitMap
+from khistory import KHistory
+from kverifiers import KVerifier
 
 
 class KNonograms(KObject):
@@ -12,6 +15,10 @@ class KNonograms(KObject):
     VERTICAL = 2
     IMAGE = 3
     CURRENT_MODE = KBlock.EMPTY
+    ZOOM_MIN = 0.25
+    ZOOM_MAX = 4.0
+    CELL_MIN = 4
+    PANEL_SHARE = 0.4
 
     def __init__(
         self,
@@ -21,19 +28,31 @@ class KNonograms(KObject):
         num_numblocks:Tuple[int, int],
         size_mainblock:Tuple[int ,int],
         color_mainblocks:KColor,
-        color_numblocks:KColor
+        color_numblocks:KColor,
+        view_size:Union[Tuple[int, int], None] = None
         ):
         _szmw, _szmh = size_mainblock
         _nbmw, _nbmh = num_mainblocks
         _nbh, _nbv = num_numblocks
         _iw, _ih = _mshift = pygame.Vector2(_nbv*_szmw, _nbh*_szmh)
-        if _iw%_nbmw!=0 or _ih%_nbmh!=0:
+        if view_size is None and (_iw%_nbmw!=0 or _ih%_nbmh!=0):
             raise Exception("Cannot initialize the image grid")
+        _pw, _ph = int(_iw), int(_ih)
+        if view_size is not None:
+            # Deep clues scroll inside panels capped to a share of the view.
+            _pw = min(_pw, int(view_size[0]*KNonograms.PANEL_SHARE))
+            _ph = min(_ph, int(view_size[1]*KNonograms.PANEL_SHARE))
+            if view_size[0] - _pw <= 0 or view_size[1] - _ph <= 0:
+                raise ValueError(
+                    f"a {view_size} view leaves no room for the board"
+                )
         super(KNonograms, self).__init__(
             screen,
-            pygame.Surface((_iw+_nbmw*_szmw, _ih+_nbmh*_szmh)),
+            pygame.Surface((0, 0)),
             position
         )
+        self.rect.size = (_iw+_nbmw*_szmw, _ih+_nbmh*_szmh) \
+            if view_size is None else view_size
         _xi, _yi = self.get_position()
         self.grids = {
             KNonograms.MAIN: KGrid(
@@ -69,7 +88,9 @@ class KNonograms(KObject):
             KNonograms.IMAGE: KGrid(
                 KBlock(
                     screen = screen,
-                    size = ( int(_iw//_nbmw), int(_ih//_nbmh) ),
+                    size = (
+                        max(int(_pw//_nbmw), 1), max(int(_ph//_nbmh), 1)
+                    ),
                     position = self.get_position(),
                     color_default = color_mainblocks,
                     clickable = False
@@ -77,21 +98,148 @@ class KNonograms(KObject):
                 num_blocks = num_mainblocks
             )
         }
-        self.history = list()
-        self.pih = -1
+        self.states = {
+            key: grid.states for key, grid in self.grids.items()
+            if key != KNonograms.IMAGE
+        }
+        self.verifier = None
+        self.col_runs = list()
+        self.row_runs = list()
+        self.col_ok = list()
+        self.row_ok = list()
+        self.num_unsatisfied = -1
+        self.history = KHistory()
+        self.stroke = None
+        self.stroke_mode = KNonograms.CURRENT_MODE
+        self.stroke_last = None
+        self.stroke_pending = list()
+        self.size_mainblock = (_szmw, _szmh)
+        self.color_mainblocks = color_mainblocks
+        self.color_numblocks = color_numblocks
+        self.zoom = 1.0
+        self.offset = (0, 0)
+        self.clue_range = (int(_iw)-_pw, int(_ih)-_ph)
+        self.clue_offset = self.clue_range
+        self.view = None
+        if view_size is not None:
+            self.view = pygame.Rect(
+                _xi+_pw, _yi+_ph, self.rect.width-_pw, self.rect.height-_ph
+            )
+            self.panels = {
+                KNonograms.MAIN: self.view.copy(),
+                KNonograms.HORIZONTAL: pygame.Rect(
+                    self.view.left, _yi, self.view.width, _ph
+                ),
+                KNonograms.VERTICAL: pygame.Rect(
+                    _xi, self.view.top, _pw, self.view.height
+                ),
+                KNonograms.IMAGE: pygame.Rect(_xi, _yi, _pw, _ph)
+            }
+            for key, grid in self.grids.items():
+                grid.set_clip(self.panels[key])
+            self._layout()
 
     # Overridden
     def draw(self, *gnums:int) -> None:
         for gnum in gnums:
-            self.grids[gnum].draw_all()
+            if self.view is not None:
+                self.screen.fill(
+                    self.color_mainblocks
+                    if gnum in (KNonograms.MAIN, KNonograms.IMAGE)
+                    else self.color_numblocks,
+                    self.panels[gnum]
+                )
+            self.grids[gnum].draw_all(
+                bdin=not gnum == KNonograms.IMAGE,
+                clr=KColor.name('black')
+            )
 
     # Overridden
     def draw_all(self) -> None:
+        if self.view is not None:
+            self.draw(*self.grids)
+            return
         for key, grid in self.grids.items():
-            grid.draw_all(bdin=not key == KNonograms.IMAGE)
+            grid.draw_all(
+                bdin=not key == KNonograms.IMAGE,
+                clr=KColor.name('black')
+            )
+
+    def _layout(self) -> None:
+        _ox, _oy = self.offset
+        _cx, _cy = self.clue_offset
+        _view = self.view
+        self.grids[KNonograms.MAIN].set_origin(
+            (_view.left-_ox, _view.top-_oy)
+        )
+        self.grids[KNonograms.HORIZONTAL].set_origin(
+            (_view.left-_ox, self.rect.top-_cy)
+        )
+        self.grids[KNonograms.VERTICAL].set_origin(
+            (self.rect.left-_cx, _view.top-_oy)
+        )
+
+    def scroll_to(self, ox:int, oy:int) -> None:
+        if self.view is None:
+            return
+        _main = self.grids[KNonograms.MAIN].rect
+        _maxx = max(_main.width - self.view.width, 0)
+        _maxy = max(_main.height - self.view.height, 0)
+        self.offset = (
+            min(max(int(ox), 0), _maxx), min(max(int(oy), 0), _maxy)
+        )
+        self._layout()
+        self.draw(KNonograms.MAIN, KNonograms.HORIZONTAL, KNonograms.VERTICAL)
+
+    def scroll(self, dx:int, dy:int) -> None:
+        if self.view is None:
+            return
+        self.scroll_to(self.offset[0]+dx, self.offset[1]+dy)
+
+    def scroll_clues(self, dx:int, dy:int) -> None:
+        # Clues start scrolled to the end, next to the board.
+        if self.view is None:
+            return
+        _mx, _my = self.clue_range
+        _cx, _cy = self.clue_offset
+        self.clue_offset = (
+            min(max(int(_cx+dx), 0), _mx), min(max(int(_cy+dy), 0), _my)
+        )
+        self._layout()
+        self.draw(KNonograms.HORIZONTAL, KNonograms.VERTICAL)
+
+    def set_zoom(
+        self,
+        zoom:float,
+        anchor:Union[KType.Pos2D, None] = None
+        ) -> None:
+        if self.view is None:
+            return
+        zoom = min(max(zoom, KNonograms.ZOOM_MIN), KNonograms.ZOOM_MAX)
+        _szmw, _szmh = self.size_mainblock
+        _size = (
+            max(round(_szmw*zoom), KNonograms.CELL_MIN),
+            max(round(_szmh*zoom), KNonograms.CELL_MIN)
+        )
+        _main = self.grids[KNonograms.MAIN]
+        _w, _h = _main.unit_origin.rect.size
+        _ax, _ay = self.view.center if anchor is None else anchor
+        # Keep the board point under the anchor where it is on screen.
+        _bx = (_ax - _main.rect.left) / _w
+        _by = (_ay - _main.rect.top) / _h
+        _main.set_cell_size(_size)
+        self.grids[KNonograms.HORIZONTAL].set_cell_size((_size[0], _szmh))
+        self.grids[KNonograms.VERTICAL].set_cell_size((_szmw, _size[1]))
+        self.zoom = zoom
+        self.scroll_to(
+            _bx*_size[0] - (_ax-self.view.left),
+            _by*_size[1] - (_ay-self.view.top)
+        )
 
     def register(self, puzzle:KType.Puzzle) -> None:
         hdict, vdict = puzzle
+        self.verifier = KVerifier(puzzle)
+        self._track_all()
         _g = self.grids[KNonograms.HORIZONTAL]
         _gu = _g.unit_origin
         _maxlvl = _g.num_blocks[1] - 1
@@ -131,76 +279,157 @@ class KNonograms(KObject):
                     )
                 ))
 
+    def verify(self) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        if self.verifier is None:
+            raise ValueError("no puzzle has been registered")
+        return self.verifier.verify(self.states[KNonograms.MAIN])
+
+    def _track_all(self) -> None:
+        if self.verifier is None:
+            return
+        _main = self.states[KNonograms.MAIN]
+        col_ok, row_ok = self.verifier.verify(_main)
+        self.col_ok = col_ok.tolist()
+        self.row_ok = row_ok.tolist()
+        self.col_runs = [
+            KVerifier.line_runs(_main[xi, :]) for xi in range(_main.shape[0])
+        ]
+        self.row_runs = [
+            KVerifier.line_runs(_main[:, yi]) for yi in range(_main.shape[1])
+        ]
+        self.num_unsatisfied = \
+            self.col_ok.count(False) + self.row_ok.count(False)
+
+    def _track(self, xi:int, yi:int) -> None:
+        self._track_lines((xi,), (yi,))
+
+    def _track_lines(self, cols:Iterable[int], rows:Iterable[int]) -> None:
+        if self.verifier is None:
+            return
+        _main = self.states[KNonograms.MAIN]
+        for xi in cols:
+            self.col_runs[xi] = KVerifier.line_runs(_main[xi, :])
+            _col = self.col_runs[xi] == self.verifier.col_runs[xi]
+            self.num_unsatisfied += self.col_ok[xi] - _col
+            self.col_ok[xi] = _col
+        for yi in rows:
+            self.row_runs[yi] = KVerifier.line_runs(_main[:, yi])
+            _row = self.row_runs[yi] == self.verifier.row_runs[yi]
+            self.num_unsatisfied += self.row_ok[yi] - _row
+            self.row_ok[yi] = _row
+
+    def is_col_satisfied(self, xi:int) -> bool:
+        return self.col_ok[xi]
+
+    def is_row_satisfied(self, yi:int) -> bool:
+        return self.row_ok[yi]
+
+    def is_solved(self) -> bool:
+        return self.num_unsatisfied == 0
+
     def scm(self, mode:int) -> None:
         KNonograms.CURRENT_MODE = mode
 
     def _clear(self) -> None:
-        for key, grid in self.grids.items():
-            _hnum, _vnum = grid.num_blocks
-            for c in range(_hnum):
-                for r in range(_vnum):
-                    grid.unit_array[c][r].state = KBlock.EMPTY
-            grid.draw_all(bdin=not key==KNonograms.IMAGE)
+        for states in self.states.values():
+            states.fill(KBlock.EMPTY)
+        self._sync()
+        self.draw_all()
+
+    def _sync(self) -> None:
+        _image = self.grids[KNonograms.IMAGE].states
+        numpy.copyto(_image, self.states[KNonograms.MAIN])
+        _image[_image != KBlock.FILLED] = KBlock.EMPTY
+        self._track_all()
+
+    def _set(self, key:int, xi:int, yi:int, state:int) -> None:
+        grid = self.grids[key]
+        grid.states[xi, yi] = state
+        grid.draw((xi, yi), clr=KColor.name('black'))
+        if key == KNonograms.MAIN:
+            gridi = self.grids[KNonograms.IMAGE]
+            gridi.states[xi, yi] = \
+                state if state == KBlock.FILLED else KBlock.EMPTY
+            gridi.draw((xi, yi), bdin=False, clr=KColor.name('black'))
+            self._track(xi, yi)
+
+    def _set_many(
+        self,
+        key:int,
+        indices:List[Tuple[int, int]],
+        states:List[int]
+        ) -> None:
+        if not indices:
+            return
+        _xs, _ys = numpy.array(indices, numpy.intp).T
+        _states = numpy.array(states, numpy.uint8)
+        grid = self.grids[key]
+        grid.states[_xs, _ys] = _states
+        grid.draw(*indices, clr=KColor.name('black'))
+        if key == KNonograms.MAIN:
+            gridi = self.grids[KNonograms.IMAGE]
+            gridi.states[_xs, _ys] = numpy.where(
+                _states == KBlock.FILLED, KBlock.FILLED, KBlock.EMPTY
+            )
+            gridi.draw(*indices, bdin=False, clr=KColor.name('black'))
+            self._track_lines(set(_xs.tolist()), set(_ys.tolist()))
+
+    def export_states(self) -> Dict[int, numpy.ndarray]:
+        return {key: states.copy() for key, states in self.states.items()}
+
+    def import_states(
+        self,
+        states:Dict[int, numpy.ndarray],
+        redraw:bool = True
+        ) -> None:
+        for key, _states in states.items():
+            numpy.copyto(self.states[key], _states)
+        self._sync()
+        if redraw:
+            self.draw_all()
+
+    @property
+    def pih(self) -> int:
+        return self.history.pih
 
     def reset(self) -> None:
+        self.history.push_reset(self.states)
         self._clear()
-        if self.pih != len(self.history)-1:
-            self.history = self.history[:self.pih+1] 
-        self.history.append(self.pih)
-        self.pih += 1
 
-    def undo(self) -> None:
-        if self.pih >= 0:
-            _history = self.history[self.pih]
-            if type(_history) is int:
+    def _replay(self, entries:List[Tuple], is_undo:bool) -> None:
+        if entries[0][0] == KHistory.RESET:
+            if is_undo:
+                entries[0][1].restore(self.states)
+                self._sync()
+                self.draw_all()
+            else:
                 self._clear()
-                for _tpih in range(_history+1):
-                    print(_tpih)
-                    key, (xi, yi), (_, state) = self.history[_tpih]
-                    _g = self.grids[key].unit_array[xi][yi]
-                    _g.state = state
-                    _g.draw(clr=KColor.name('black'))
-                    self.grids[key].draw_borders()
-                    if key == KNonograms.MAIN:
-                        _gi = self.grids[KNonograms.IMAGE].unit_array[xi][yi]
-                        _gi.state = state
-                        _gi.draw(clr=KColor.name('black'))
-                        self.grids[KNonograms.IMAGE].draw_borders(bdin=False)
-                self.pih -= 1
-                return
-            key, (xi, yi), (state, _) = _history
-            _g = self.grids[key].unit_array[xi][yi]
-            _g.state = state
-            _g.draw(clr=KColor.name('black'))
-            self.grids[key].draw_borders()
-            if key == KNonograms.MAIN:
-                _gi = self.grids[KNonograms.IMAGE].unit_array[xi][yi]
-                _gi.state = state
-                _gi.draw(clr=KColor.name('black'))
-                self.grids[KNonograms.IMAGE].draw_borders(bdin=False)
-            self.pih -= 1
+            return
+        moves = dict()
+        for _, key, ind, old, new in entries:
+            _inds, _states = moves.setdefault(key, (list(), list()))
+            _inds.append(ind)
+            _states.append(old if is_undo else new)
+        for key, (inds, states) in moves.items():
+            self._set_many(key, inds, states)
+
+    def undo(self) -> None:
+        entries = self.history.undo()
+        if entries is not None:
+            self._replay(entries, True)
 
     def redo(self) -> None:
-        if self.pih+1 < len(self.history):
-            _history = self.history[self.pih+1]
-            if type(_history) is int:
-                self._clear()
-                self.pih += 1
-                return
-            key, (xi, yi), (_, state) = _history
-            _g = self.grids[key].unit_array[xi][yi]
-            _g.state = state
-            _g.draw(clr=KColor.name('black'))
-            self.grids[key].draw_borders()
-            if key == KNonograms.MAIN:
-                _gi = self.grids[KNonograms.IMAGE].unit_array[xi][yi]
-                _gi.state = state
-                _gi.draw(clr=KColor.name('black'))
-                self.grids[KNonograms.IMAGE].draw_borders(bdin=False)
-            self.pih += 1
-
-    def restart(self):
-        pass
+        entries = self.history.redo()
+        if entries is not None:
+            self._replay(entries, False)
+
+    def restart(self) -> None:
+        journal = self.history.journal
+        self.history = KHistory()
+        self._clear()
+        if journal is not None:
+            self.history.journal = journal
+            journal.compact()
 
     def check(
         self, 
@@ -210,32 +439,117 @@ class KNonograms(KObject):
         if not self.is_enclosing(mouse_position):
             return False
         for key, grid in self.grids.items():
-            if not grid.is_enclosing(mouse_position) or key==KNonograms.IMAGE:
+            if key == KNonograms.IMAGE:
                 continue
-            xi, yi = ind = grid.block_index_at(mouse_position)
-            _g = grid.unit_array[xi][yi]
-            if not _g.clickable:
-                return False
-            _state = _g.state
-            if key == KNonograms.MAIN:
-                _g.state = KNonograms.CURRENT_MODE
-                _g.draw(clr=KColor.name('black'))
-                grid.draw_borders()
-                gridi = self.grids[KNonograms.IMAGE]
-                _gi = gridi.unit_array[xi][yi]
-                _gi.state = _g.state if _g.state==KBlock.FILLED else KBlock.EMPTY
-                _gi.draw(clr=KColor.name('black'))
-                gridi.draw_borders(bdin=False)
-            else:
-                _g.state = KBlock.CROSSED if _g.state==KBlock.EMPTY else KBlock.EMPTY
-                _g.draw(clr=KColor.name('black'))
-                grid.draw_borders()
-            if self.pih != len(self.history)-1:
-                self.history = self.history[:self.pih+1] 
-            self.history.append((key, ind, (_state, _g.state)))
-            self.pih += 1
-            return True
+            ind = grid.block_index_at(mouse_position)
+            if ind is not None:
+                return self.click(key, ind)
         return False
 
+    def click(self, key:int, ind:Tuple[int, int]) -> bool:
+        xi, yi = ind
+        grid = self.grids[key]
+        if not grid.is_clickable(xi, yi):
+            return False
+        _state = int(grid.states[xi, yi])
+        if key == KNonograms.MAIN:
+            state = KNonograms.CURRENT_MODE
+        else:
+            state = KBlock.CROSSED if _state==KBlock.EMPTY else KBlock.EMPTY
+        self._set(key, xi, yi, state)
+        self.history.push_move(key, ind, _state, state)
+        return True
+
+    @staticmethod
+    def trace(
+        start:Tuple[int, int],
+        end:Tuple[int, int]
+        ) -> List[Tuple[int, int]]:
+        (_x, _y), (_xe, _ye) = start, end
+        _dx, _dy = abs(_xe-_x), -abs(_ye-_y)
+        _sx = 1 if _x < _xe else -1
+        _sy = 1 if _y < _ye else -1
+        _err = _dx + _dy
+        cells = [(_x, _y)]
+        while (_x, _y) != (_xe, _ye):
+            _e2 = 2*_err
+            if _e2 >= _dy:
+                _err += _dy
+                _x += _sx
+            if _e2 <= _dx:
+                _err += _dx
+                _y += _sy
+            cells.append((_x, _y))
+        return cells
+
+    def is_stroking(self) -> bool:
+        return self.stroke is not None
+
+    def begin_stroke(self, ind:Tuple[int, int]) -> None:
+        # A press that arrives before the release closes the open stroke.
+        self.end_stroke()
+        self.stroke = dict()
+        self.stroke_mode = KNonograms.CURRENT_MODE
+        self.stroke_last = ind
+        self._paint((ind,))
+
+    def extend_stroke(self, mouse_position:KType.Pos2D) -> None:
+        if self.stroke is None:
+            return
+        grid = self.grids[KNonograms.MAIN]
+        _w, _h = grid.unit_origin.rect.size
+        _x, _y = mouse_position
+        ind = (int(_x-grid.rect.left)//_w, int(_y-grid.rect.top)//_h)
+        if ind == self.stroke_last:
+            return
+        _cells = KNonograms.trace(self.stroke_last, ind)[1:]
+        self.stroke_last = ind
+        _x0, _x1, _y0, _y1 = grid.visible_range()
+        self._paint(tuple(
+            (xi, yi) for xi, yi in _cells if _x0 <= xi < _x1 and _y0 <= yi < _y1
+        ))
+
+    def _paint(self, cells:Iterable[Tuple[int, int]]) -> None:
+        _states = self.states[KNonograms.MAIN]
+        for ind in cells:
+            if ind in self.stroke:
+                continue
+            _old = int(_states[ind])
+            self.stroke[ind] = _old
+            if _old != self.stroke_mode:
+                self.stroke_pending.append(ind)
+
+    def flush_stroke(self) -> None:
+        if not self.stroke_pending:
+            return
+        self._set_many(
+            KNonograms.MAIN,
+            self.stroke_pending,
+            [self.stroke_mode] * len(self.stroke_pending)
+        )
+        self.stroke_pending = list()
+
+    def end_stroke(self) -> bool:
+        if self.stroke is None:
+            return False
+        self.flush_stroke()
+        self.history.push_stroke(
+            KNonograms.MAIN,
+            [
+                (ind, old, self.stroke_mode)
+                for ind, old in self.stroke.items() if old != self.stroke_mode
+            ]
+        )
+        self.stroke = None
+        return True
+
+    def add_hits(self, hitmap:KHitMap) -> None:
+        for key, grid in self.grids.items():
+            if key != KNonograms.IMAGE:
+                hitmap.add(
+                    grid.rect if grid.clip is None else grid.clip,
+                    self, key, grid
+                )
+
     # Overridden
     def copy(): pass
@@ -4,13 +4,18 @@ import pygame.font
 import pygame.image
 
 import os
-from PIL import Image
-from typing import Union, Tuple, Callable, Any
+import queue
+import numpy
+import threading
+from collections import deque, OrderedDict
+from typing import Union, Tuple, List, Callable, Any
 
-from kauxiliaries import KType, KColor
+from kauxiliaries import KType, KColor, KFont
 
 
 class KObject():
+    DIRTY = list()
+
     def __init__(
         self, 
         screen:pygame.Surface, 
@@ -23,6 +28,17 @@ class KObject():
 
     def draw(self) -> None:
         self.screen.blit(self.surface, self.rect)
+        KObject.DIRTY.append(self.rect.copy())
+
+    @staticmethod
+    def mark_dirty(*rects:pygame.Rect) -> None:
+        KObject.DIRTY.extend(pygame.Rect(rect) for rect in rects)
+
+    @staticmethod
+    def pop_dirty() -> List[pygame.Rect]:
+        rects = KObject.DIRTY
+        KObject.DIRTY = list()
+        return rects
 
     def get_position(self) -> pygame.Vector2:
         return pygame.Vector2(self.rect.topleft)
@@ -63,44 +79,153 @@ class KObject():
 
 
 class KGIF(KObject):
+    QUEUE_SIZE = 8
+
     def __init__(
         self,
         screen:pygame.Surface,
         position:KType.Pos2D,
         fpath:str = os.getcwd(),
-        Ts:int = 1
+        Ts:int = 1,
+        stream:bool = False,
+        resident:Union[int, None] = None,
+        frames:Union[List[pygame.Surface], None] = None
         ):
-        self.frames = list()
+        self.fpath = fpath
+        self.Ts = Ts
+        self.resident = resident
+        self.frames = list() if resident is None else deque(maxlen=resident)
         self.cframe = 0
-        def add_pyimage(frames:list, img:Image) -> None:
-            _img = img.convert('RGBA')
-            frames.append(
-                pygame.image.fromstring(
-                    _img.tobytes(),
-                    _img.size,
-                    _img.mode
-                ).convert_alpha()
-            )
+        self.queue = None
+        self.decoder = None
+        self.stopping = threading.Event()
+        if frames is not None:
+            self.resident = None
+            self.frames = list(frames)[::Ts]
+            self.num_loaded = self.num_frames = len(self.frames)
+            super(KGIF, self).__init__(screen, self.frames[0], position)
             return
+        # PIL is only needed once a file is actually decoded.
+        from PIL import Image
         with Image.open(fpath) as image:
-            add_pyimage(self.frames, image)
+            self.num_frames = -(-getattr(image, 'n_frames', 1) // Ts)
+            self.frames.append(KGIF.to_pyimage(*KGIF.decode(image)))
+            self.num_loaded = 1
             super(KGIF, self).__init__(screen, self.frames[0], position)
-            while True:
-                try:
-                    image.seek(image.tell()+Ts)
-                except EOFError:
-                    break
-                else:
-                    add_pyimage(self.frames, image)
-                
-    def step(self, step:int=1, backward:bool=False) -> None:
+            if not stream:
+                for data, size in KGIF.iter_frames(image, Ts, Ts):
+                    self.frames.append(KGIF.to_pyimage(data, size))
+                self.num_loaded = self.num_frames = len(self.frames)
+                return
+        self.queue = queue.Queue(KGIF.QUEUE_SIZE)
+        self.decoder = threading.Thread(target=self._decode_all, daemon=True)
+        self.decoder.start()
+
+    @staticmethod
+    def decode(image:Any) -> Tuple[bytes, Tuple[int, int]]:
+        _img = image.convert('RGBA')
+        return _img.tobytes(), _img.size
+
+    @staticmethod
+    def to_pyimage(data:bytes, size:Tuple[int, int]) -> pygame.Surface:
+        # frombuffer wraps the decoded bytes as they are, so convert_alpha
+        # is the only copy a frame goes through.
+        return pygame.image.frombuffer(data, size, 'RGBA').convert_alpha()
+
+    @staticmethod
+    def iter_frames(image:Any, start:int, Ts:int):
+        _n = start
+        while True:
+            try:
+                image.seek(_n)
+            except EOFError:
+                return
+            yield KGIF.decode(image)
+            _n += Ts
+
+    def _put(self, item:Any) -> bool:
+        while not self.stopping.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def _decode_all(self) -> None:
+        from PIL import Image
+        try:
+            with Image.open(self.fpath) as image:
+                _start = self.Ts
+                while True:
+                    for item in KGIF.iter_frames(image, _start, self.Ts):
+                        if not self._put(item):
+                            return
+                    # A window of resident frames keeps replaying the file.
+                    if self.resident is None:
+                        break
+                    _start = 0
+        except Exception as error:
+            self._put(error)
+        else:
+            self._put(None)
+
+    def pump(self, limit:Union[int, None] = None) -> int:
+        if self.queue is None:
+            return 0
+        _count = 0
+        while limit is None or _count < limit:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self.num_frames = self.num_loaded
+                self.close()
+                break
+            if isinstance(item, Exception):
+                self.close()
+                raise item
+            self.frames.append(KGIF.to_pyimage(*item))
+            self.num_loaded += 1
+            _count += 1
+        return _count
+
+    def progress(self) -> float:
+        return min(1., self.num_loaded/self.num_frames)
+
+    def is_loaded(self) -> bool:
+        return self.num_loaded >= self.num_frames
+
+    def close(self) -> None:
+        self.stopping.set()
+        if self.decoder is not None \
+            and self.decoder is not threading.current_thread():
+            self.decoder.join()
+        self.decoder = None
+        self.queue = None
+
+    def step(self, step:int=1, backward:bool=False) -> bool:
+        if self.resident is not None:
+            if backward:
+                raise ValueError("a windowed gif can only step forward")
+            _taken = self.pump(step)
+            if not _taken:
+                return False
+            self.cframe = (self.cframe + _taken) % self.num_frames
+            self.surface = self.frames[-1]
+            return True
+        self.pump()
         if backward:
             _next = self.cframe - step
             self.cframe = _next if _next>=0 else len(self.frames) - 1
         else:
             _next = self.cframe + step
+            if _next >= len(self.frames) and not self.is_loaded():
+                return False
             self.cframe = _next if _next<len(self.frames) else 0
         self.surface = self.frames[self.cframe]
+        return True
 
     def get(
         self,
@@ -131,90 +256,92 @@ class KBlock(KObject):
         clickable:bool = False,
         inner_factor:KType.Float01 = 0.8
         ):
+        # Blocks draw from the shared sprites, so the surface is only the
+        # cached empty sprite and is never drawn on.
         super(KBlock, self).__init__(
-            screen, pygame.Surface(size), position
+            screen, KSprite.get(size, color_default, KBlock.EMPTY), position
         )
         self.color_default = color_default
-        self.surface.fill(color_default)
         self.color = color_default
-        self.state = KBlock.EMPTY
+        self.states = None
+        self.index = None
+        self._state = KBlock.EMPTY
         self.clickable = clickable
         self.inner_factor = inner_factor
-        self.inner_cross = KObject(
-            screen,
-            pygame.Surface(
-                tuple(int(inner_factor*dim) for dim in size)
-            ),
-            position
-        )
-        self.inner_cross.set_center(self.get_center())
-        self.inner_dot = KObject(
-            screen,
-            pygame.Surface(
-                tuple(int((1-inner_factor)*dim) for dim in size)
-            ),
-            position
-        )
-        self.inner_dot.set_center(self.get_center())
         self.inner_object = None
 
+    @property
+    def state(self) -> int:
+        if self.states is None:
+            return self._state
+        return int(self.states[self.index])
+
+    @state.setter
+    def state(self, value:int) -> None:
+        if self.states is None:
+            self._state = value
+        else:
+            self.states[self.index] = value
+
+    def bind(
+        self,
+        states:Union[numpy.ndarray, None],
+        index:Union[Tuple[int, int], None] = None
+        ) -> None:
+        if states is None:
+            self._state = self.state
+        self.states = states
+        self.index = index
+
+    def set_size(self, size:Tuple[int, int]) -> None:
+        self.rect.size = size
+
     # Overridden
     def draw(self, clr:Union[KColor, None]=None) -> None:
-        def clear():
-            self.color = self.color_default
-            self.surface.fill(self.color)
-            super(KBlock, self).draw()
-            if self.inner_object is not None:
-                self.inner_object.draw()
-            return
-        if self.state == KBlock.EMPTY:
-            clear()
-        elif self.state == KBlock.FILLED:
-            self.color = self.color if clr is None else clr 
-            self.surface.fill(self.color)
-            super(KBlock, self).draw()
-        elif self.state == KBlock.CROSSED:
-            clear()
-            _rect = self.inner_cross.rect
-            pygame.draw.line(
-                self.screen,
-                self.color_default if clr is None else clr,
-                _rect.topleft,
-                _rect.bottomright,
-                width = 3
+        _size = self.rect.size
+        if self.state == KBlock.FILLED:
+            self.color = self.color if clr is None else clr
+            self.screen.blit(
+                KSprite.get(
+                    _size,
+                    self.color_default,
+                    KBlock.FILLED,
+                    self.color,
+                    self.inner_factor
+                ),
+                self.rect
             )
-            pygame.draw.line(
-                self.screen,
-                self.color_default if clr is None else clr,
-                _rect.bottomleft,
-                _rect.topright,
-                width = 3
+        elif self.inner_object is None:
+            self.color = self.color_default
+            self.screen.blit(
+                KSprite.get(
+                    _size,
+                    self.color_default,
+                    self.state,
+                    clr,
+                    self.inner_factor
+                ),
+                self.rect
             )
-        elif self.state == KBlock.DOTTED:
-            clear()
-            self.inner_dot.draw()
-        elif self.state == KBlock.CHECKED:
-            clear()
-            _rect = self.inner_cross.rect
-            pygame.draw.line(
-                self.screen,
-                self.color_default if clr is None else clr,
-                _rect.bottomleft,
-                _rect.topright,
-                width = 3
+        else:
+            self.color = self.color_default
+            self.screen.blit(
+                KSprite.get(_size, self.color_default, KBlock.EMPTY),
+                self.rect
             )
-
-    # Overridden
-    def set_position(self, destination: Union[KType.Pos2D, None]) -> None:
-        super(KBlock, self).set_position(destination)
-        self.inner_cross.set_position(destination)
-        self.inner_dot.set_position(destination)
-
-    # Overridden
-    def set_center(self, destination: Union[KType.Pos2D, None]) -> None:
-        super(KBlock, self).set_center(destination)
-        self.inner_cross.set_center(destination)
-        self.inner_dot.set_center(destination)
+            self.inner_object.draw()
+            if self.state != KBlock.EMPTY:
+                self.screen.blit(
+                    KSprite.get(
+                        _size,
+                        KSprite.CLEAR,
+                        self.state,
+                        self.color_default if clr is None else clr,
+                        self.inner_factor
+                    ),
+                    self.rect
+                )
+        KObject.DIRTY.append(self.rect.copy())
 
     # Overridden
     def copy(self, destination:Union[KType.Pos2D, None]=None):
@@ -255,19 +382,12 @@ class KTextBlock(KBlock):
         )
         self.text = text
         self.font_size = font_size
+        self.font_size_default = font_size
         self.color_text = color_text
         self.is_centered = is_centered
         self.inner_object = KObject(
             screen,
-            pygame.font.Font.render(
-                pygame.font.SysFont(
-                    pygame.font.get_default_font(),
-                    font_size
-                ),
-                text,
-                True,
-                color_text
-            ),
+            KFont.render(text, font_size, color_text),
             position
         )
         if is_centered:
@@ -295,6 +415,27 @@ class KTextBlock(KBlock):
         else:
             self.inner_object.set_position(self.get_position())
 
+    def set_text(self, text:str) -> None:
+        self.text = text
+        self.inner_object.surface = KFont.render(
+            text, self.font_size, self.color_text
+        )
+        self.inner_object.rect.size = self.inner_object.surface.get_size()
+        self.set_position(self.rect.topleft)
+
+    # Overridden
+    def set_size(self, size:Tuple[int, int]) -> None:
+        super(KTextBlock, self).set_size(size)
+        _font_size = min(self.font_size_default, *size)
+        if _font_size != self.font_size:
+            self.font_size = _font_size
+            self.inner_object.surface = KFont.render(
+                self.text, _font_size, self.color_text
+            )
+            self.inner_object.rect.size = \
+                self.inner_object.surface.get_size()
+        self.set_position(self.rect.topleft)
+
     # Overridden
     def copy(self, destination:Union[KType.Pos2D, None]=None):
         newobj = KTextBlock(
@@ -313,6 +454,154 @@ class KTextBlock(KBlock):
         return newobj
 
 
+class KSprite():
+    CACHE = OrderedDict()
+    CLEAR = KColor(0, 0, 0, 0)
+    BUDGET = 8 * 1024 * 1024
+    USED = 0
+
+    @classmethod
+    def get(
+        cls,
+        size:Tuple[int, int],
+        color_default:KColor,
+        state:int,
+        clr:Union[KColor, None] = None,
+        inner_factor:KType.Float01 = 0.8
+        ) -> pygame.Surface:
+        key = (
+            tuple(size),
+            tuple(color_default),
+            state,
+            None if clr is None else tuple(clr),
+            inner_factor
+        )
+        sprite = cls.CACHE.get(key)
+        if sprite is not None:
+            cls.CACHE.move_to_end(key)
+            return sprite
+        sprite = cls.CACHE[key] = KSprite.render(
+            size, color_default, state, clr, inner_factor
+        )
+        cls.USED += KFont.cost(sprite)
+        while cls.USED > cls.BUDGET and len(cls.CACHE) > 1:
+            _, _sprite = cls.CACHE.popitem(last=False)
+            cls.USED -= KFont.cost(_sprite)
+        return sprite
+
+    @classmethod
+    def clear(cls) -> None:
+        cls.CACHE.clear()
+        cls.USED = 0
+
+    @staticmethod
+    def render(
+        size:Tuple[int, int],
+        color_default:KColor,
+        state:int,
+        clr:Union[KColor, None],
+        inner_factor:KType.Float01
+        ) -> pygame.Surface:
+        if pygame.Color(color_default).a < 255:
+            sprite = pygame.Surface(size, pygame.SRCALPHA)
+        else:
+            sprite = pygame.Surface(size)
+        _clr = color_default if clr is None else clr
+        if state == KBlock.FILLED:
+            sprite.fill(_clr)
+            return sprite
+        sprite.fill(color_default)
+        _center = sprite.get_rect().center
+        _cross = pygame.Rect(
+            (0, 0), tuple(int(inner_factor*dim) for dim in size)
+        )
+        _cross.center = _center
+        if state == KBlock.CROSSED:
+            pygame.draw.line(
+                sprite, _clr, _cross.topleft, _cross.bottomright, width=3
+            )
+            pygame.draw.line(
+                sprite, _clr, _cross.bottomleft, _cross.topright, width=3
+            )
+        elif state == KBlock.DOTTED:
+            _dot = pygame.Rect(
+                (0, 0), tuple(int((1-inner_factor)*dim) for dim in size)
+            )
+            _dot.center = _center
+            sprite.fill(KColor(0, 0, 0, 255), _dot)
+        elif state == KBlock.CHECKED:
+            pygame.draw.line(
+                sprite, _clr, _cross.bottomleft, _cross.topright, width=3
+            )
+        return sprite
+
+
+class KCell():
+    __slots__ = ('grid', 'index')
+
+    def __init__(self, grid:"KGrid", index:Tuple[int, int]):
+        self.grid = grid
+        self.index = index
+
+    @property
+    def state(self) -> int:
+        return int(self.grid.states[self.index])
+
+    @state.setter
+    def state(self, value:int) -> None:
+        self.grid.states[self.index] = value
+
+    @property
+    def screen(self) -> pygame.Surface:
+        return self.grid.screen
+
+    @property
+    def rect(self) -> pygame.Rect:
+        return self.grid.cell_rect(*self.index)
+
+    @property
+    def color_default(self) -> KColor:
+        return self.grid.unit_origin.color_default
+
+    @property
+    def clickable(self) -> bool:
+        return self.grid.unit_origin.clickable
+
+    def get_position(self) -> pygame.Vector2:
+        return pygame.Vector2(self.rect.topleft)
+
+    def get_center(self) -> pygame.Vector2:
+        return pygame.Vector2(self.rect.center)
+
+    def is_enclosing(
+        self,
+        position:KType.Pos2D,
+        boundary:bool = True
+        ) -> bool:
+        return KObject.is_enclosing(self, position, boundary)
+
+    def draw(self, clr:Union[KColor, None]=None) -> None:
+        self.grid.draw(self.index, bdin=False, bdout=False, clr=clr)
+
+
+class KGridView():
+    __slots__ = ('grid', 'column')
+
+    def __init__(self, grid:"KGrid", column:Union[int, None]=None):
+        self.grid = grid
+        self.column = column
+
+    def __len__(self) -> int:
+        return self.grid.num_blocks[0 if self.column is None else 1]
+
+    def __getitem__(self, i:int) -> Union["KGridView", KBlock, KCell]:
+        if not 0 <= i < len(self):
+            raise IndexError("grid index out of range")
+        if self.column is None:
+            return KGridView(self.grid, i)
+        return self.grid.cell(self.column, i)
+
+
 class KGrid(KObject):
     def __init__(
         self,
@@ -325,78 +614,273 @@ class KGrid(KObject):
         _xu, _yu = _posu = unit_origin.get_position()
         super(KGrid, self).__init__(
             unit_origin.screen,
-            pygame.Surface((_wu*_hnum, _hu*_vnum)),
+            unit_origin.surface,
             _posu,
         )
-        self.unit_array = [[unit_origin.copy(
-            (_xu+c*_wu, _yu+r*_hu)
-        ) for r in range(_vnum)] for c in range(_hnum)]
-        _cnr_loop = (
-            self.rect.topleft,
-            self.rect.topright,
-            self.rect.bottomright,
-            self.rect.bottomleft,
-            self.rect.topleft
+        self.rect.size = (_wu*_hnum, _hu*_vnum)
+        self.states = numpy.full(num_blocks, unit_origin.state, numpy.uint8)
+        self.overrides = dict()
+        self.unit_array = KGridView(self)
+        self.clip = None
+        self.positions = list()
+        self.positions_geometry = None
+
+    def set_origin(self, position:Tuple[int, int]) -> None:
+        self.rect.topleft = position
+
+    def set_cell_size(self, size:Tuple[int, int]) -> None:
+        _hnum, _vnum = self.num_blocks
+        self.unit_origin.rect.size = size
+        self.rect.size = (size[0]*_hnum, size[1]*_vnum)
+        for block in self.overrides.values():
+            block.set_size(size)
+
+    def set_clip(self, clip:Union[pygame.Rect, None]) -> None:
+        self.clip = None if clip is None else pygame.Rect(clip)
+
+    def visible_range(self) -> Tuple[int, int, int, int]:
+        _hnum, _vnum = self.num_blocks
+        if self.clip is None:
+            return 0, _hnum, 0, _vnum
+        _w, _h = self.unit_origin.rect.size
+        _view = self.clip.clip(self.rect)
+        if not _view.width or not _view.height:
+            return 0, 0, 0, 0
+        return (
+            (_view.left-self.rect.left)//_w,
+            min(-(-(_view.right-self.rect.left)//_w), _hnum),
+            (_view.top-self.rect.top)//_h,
+            min(-(-(_view.bottom-self.rect.top)//_h), _vnum)
         )
-        self.border_outer = list((
-            _cnr_loop[i], _cnr_loop[i+1]
-        ) for i in range(len(_cnr_loop)-1) )
-        self.border_inner = list()
-        for r in range(1, _vnum):
-            self.border_inner.append((
-                (_xu, _yu+r*_hu), (_xu+_hnum*_wu, _yu+r*_hu)
-            ))
-        for c in range(1, _hnum):
-            self.border_inner.append((
-                (_xu+c*_wu, _yu), (_xu+c*_wu, _yu+_vnum*_hu)
-            ))
-
-    def draw_borders(self, bdin:bool=True, bdout:bool=True) -> None:
+
+    def cell(self, xi:int, yi:int) -> Union[KBlock, KCell]:
+        block = self.overrides.get((xi, yi))
+        return KCell(self, (xi, yi)) if block is None else block
+
+    def cell_rect(self, xi:int, yi:int) -> pygame.Rect:
+        _w, _h = self.unit_origin.rect.size
+        return pygame.Rect(self.rect.x+xi*_w, self.rect.y+yi*_h, _w, _h)
+
+    def draw_cell(
+        self,
+        xi:int,
+        yi:int,
+        clr:Union[KColor, None] = None
+        ) -> None:
+        _rect = self.cell_rect(xi, yi)
+        block = self.overrides.get((xi, yi))
+        if block is not None:
+            if block.rect.topleft != _rect.topleft:
+                block.set_position(_rect.topleft)
+            block.draw(clr)
+            return
+        _u = self.unit_origin
+        self.screen.blit(
+            KSprite.get(
+                _u.rect.size,
+                _u.color_default,
+                int(self.states[xi, yi]),
+                clr,
+                _u.inner_factor
+            ),
+            _rect
+        )
+        KObject.DIRTY.append(_rect)
+
+    def draw_borders(
+        self,
+        bdin:bool = True,
+        bdout:bool = True,
+        area:Union[pygame.Rect, None] = None
+        ) -> None:
+        if not (bdin or bdout):
+            return
+        # Only the lines crossing the area are drawn, straight onto the
+        # screen, so no lattice layer as big as the grid is kept around.
+        _clip = self.rect if self.clip is None else self.clip
+        _outer = _clip.inflate(4, 4)
+        _area = _outer if area is None else area.inflate(4, 4).clip(_outer)
+        if not _area.width or not _area.height:
+            return
+        _rect = self.rect
+        _w, _h = self.unit_origin.rect.size
+        _hnum, _vnum = self.num_blocks
+        _black = KColor.name('black')
+        _saved = self.screen.get_clip()
         if bdin:
-            for i, f in self.border_inner:
+            _area = _area.clip(_clip)
+            self.screen.set_clip(_area)
+            _top, _bottom = max(_rect.top, _area.top), min(_rect.bottom, _area.bottom)
+            _left, _right = max(_rect.left, _area.left), min(_rect.right, _area.right)
+            for c in range(
+                max((_area.left-_rect.left)//_w, 1),
+                min((_area.right-_rect.left)//_w + 1, _hnum)
+            ):
+                _x = _rect.left + c*_w
                 pygame.draw.line(
-                    self.screen, KColor.name('black'), i, f, 1
+                    self.screen, _black, (_x, _top), (_x, _bottom), 1
+                )
+            for r in range(
+                max((_area.top-_rect.top)//_h, 1),
+                min((_area.bottom-_rect.top)//_h + 1, _vnum)
+            ):
+                _y = _rect.top + r*_h
+                pygame.draw.line(
+                    self.screen, _black, (_left, _y), (_right, _y), 1
                 )
         if bdout:
-            for i, f in self.border_outer:
+            _area = _outer if area is None else area.inflate(4, 4).clip(_outer)
+            self.screen.set_clip(_area)
+            _cnr_loop = (
+                _rect.topleft,
+                _rect.topright,
+                _rect.bottomright,
+                _rect.bottomleft,
+                _rect.topleft
+            )
+            for i in range(len(_cnr_loop)-1):
                 pygame.draw.line(
-                    self.screen, KColor.name('black'), i, f, 3
+                    self.screen, _black, _cnr_loop[i], _cnr_loop[i+1], 3
                 )
+        self.screen.set_clip(_saved)
+        KObject.DIRTY.append(_area)
 
     # Overridden
     def draw(
         self,
         *indices:Tuple[int, int],
         bdin:bool = True,
-        bdout:bool = True
+        bdout:bool = True,
+        clr:Union[KColor, None] = None
         ):
+        if self.clip is not None:
+            _x0, _x1, _y0, _y1 = self.visible_range()
+            indices = tuple(
+                (xi, yi) for xi, yi in indices
+                if _x0 <= xi < _x1 and _y0 <= yi < _y1
+            )
+        if not indices:
+            return
+        if self.clip is not None:
+            _saved = self.screen.get_clip()
+            self.screen.set_clip(self.clip)
         for xi, yi in indices:
-            self.unit_array[xi][yi].draw()
-        self.draw_borders(bdin, bdout)
+            self.draw_cell(xi, yi, clr)
+        if self.clip is not None:
+            self.screen.set_clip(_saved)
+        _area = self.cell_rect(*indices[0])
+        if len(indices) > 1:
+            _area.unionall_ip([self.cell_rect(xi, yi) for xi, yi in indices])
+        self.draw_borders(bdin, bdout, _area)
 
-    def draw_all(self, bdin:bool=True, bdout:bool=True) -> None:
-        _hnum, _vnum = self.num_blocks
-        for c in range(_hnum):
-            for r in range(_vnum):
-                self.unit_array[c][r].draw()
+    def cell_positions(self) -> List[Tuple[int, int]]:
+        _geometry = (tuple(self.rect), self.unit_origin.rect.size)
+        if self.positions_geometry != _geometry:
+            _w, _h = self.unit_origin.rect.size
+            _x, _y = self.rect.topleft
+            _hnum, _vnum = self.num_blocks
+            self.positions = [
+                (_x+c*_w, _y+r*_h) for c in range(_hnum) for r in range(_vnum)
+            ]
+            self.positions_geometry = _geometry
+        return self.positions
+
+    def draw_all(
+        self,
+        bdin:bool = True,
+        bdout:bool = True,
+        clr:Union[KColor, None] = None
+        ) -> None:
+        _u = self.unit_origin
+        _sprites = [
+            KSprite.get(
+                _u.rect.size, _u.color_default, state, clr, _u.inner_factor
+            ) for state in range(KBlock.CHECKED+1)
+        ]
+        if self.clip is not None:
+            self.draw_visible(_sprites, clr)
+            self.draw_borders(bdin, bdout)
+            return
+        self.screen.blits(
+            zip(
+                map(_sprites.__getitem__, self.states.ravel().tolist()),
+                self.cell_positions()
+            ),
+            doreturn = False
+        )
+        for (xi, yi), block in self.overrides.items():
+            self.draw_cell(xi, yi, clr)
+        KObject.DIRTY.append(self.rect.copy())
         self.draw_borders(bdin, bdout)
 
+    def draw_visible(
+        self,
+        sprites:List[pygame.Surface],
+        clr:Union[KColor, None] = None
+        ) -> None:
+        _x0, _x1, _y0, _y1 = self.visible_range()
+        if _x0 >= _x1 or _y0 >= _y1:
+            return
+        _w, _h = self.unit_origin.rect.size
+        _x, _y = self.rect.topleft
+        _saved = self.screen.get_clip()
+        self.screen.set_clip(self.clip)
+        self.screen.blits(
+            zip(
+                map(
+                    sprites.__getitem__,
+                    self.states[_x0:_x1, _y0:_y1].ravel().tolist()
+                ),
+                [
+                    (_x+c*_w, _y+r*_h)
+                    for c in range(_x0, _x1) for r in range(_y0, _y1)
+                ]
+            ),
+            doreturn = False
+        )
+        if len(self.overrides) < (_x1-_x0)*(_y1-_y0):
+            _visible = [
+                ind for ind in self.overrides
+                if _x0 <= ind[0] < _x1 and _y0 <= ind[1] < _y1
+            ]
+        else:
+            _visible = [
+                (xi, yi) for xi in range(_x0, _x1) for yi in range(_y0, _y1)
+                if (xi, yi) in self.overrides
+            ]
+        for xi, yi in _visible:
+            self.draw_cell(xi, yi, clr)
+        self.screen.set_clip(_saved)
+        KObject.DIRTY.append(self.clip.clip(self.rect))
+
     def replace(
         self,
         *ind_block_tuples:Tuple[Tuple[int, int], KBlock]
         ) -> None:
         for (xi, yi), block in ind_block_tuples:
-            self.unit_array[xi][yi] = block
+            _old = self.overrides.get((xi, yi))
+            if _old is not None:
+                _old.bind(None)
+            block.bind(self.states, (xi, yi))
+            self.overrides[(xi, yi)] = block
 
     def block_index_at(
         self, 
         position:KType.Pos2D
         ) -> Union[Tuple[int, int], None]:
-        if not self.is_enclosing(position):
+        _x, _y = position
+        _rect = self.rect
+        if not (_rect.left <= _x < _rect.right and _rect.top <= _y < _rect.bottom):
+            return None
+        if self.clip is not None and not self.clip.collidepoint(_x, _y):
             return None
-        _xrel, _yrel = pygame.Vector2(position)- self.get_position()
         _w, _h = self.unit_origin.rect.size
-        return int(_xrel//_w), int(_yrel//_h)
+        return int(_x-_rect.left)//_w, int(_y-_rect.top)//_h
+
+    def is_clickable(self, xi:int, yi:int) -> bool:
+        block = self.overrides.get((xi, yi))
+        return self.unit_origin.clickable if block is None \
+            else block.clickable
 
     # Overridden
     def set_position(): pass
@@ -449,15 +933,6 @@ class KButton(KTextBlock):
             _cnr_loop[i], _cnr_loop[i+1]
         ) for i in range(len(_cnr_loop)-1) )      
 
-    # Overridden
-    def draw(self):
-        super(KButton, self).draw()
-        _clr = self.color_bp if self.is_pressed else self.color_br
-        for i, f in self.border:
-            pygame.draw.line(
-                self.surface, _clr, i, f, 3
-            )
-
     def toggle(self, t_f:Union[bool, None]=None) -> None:
         self.clickable = not self.clickable if t_f is None else t_f
 
@@ -468,11 +943,13 @@ class KButton(KTextBlock):
         ) -> Tuple[bool, Any]:
         if not self.is_enclosing(mouse_position) or not self.clickable:
             return False, str()
+        return True, self.click(*args, **kwargs)
+
+    def click(self, *args, **kwargs) -> Any:
         _pressed = self.is_pressed
         self.is_pressed = not _pressed and self.on_released is not None
         onclick = self.on_released if _pressed else self.on_pressed
-        value = onclick(*args, **kwargs)
-        return True, value
+        return onclick(*args, **kwargs)
 
     def press(self, *args, **kwargs) -> Any:
         self.is_pressed = self.on_released is not None
@@ -532,24 +1009,9 @@ class KProgressBar(KObject):
         self.percent.draw()
 
     def set_progress(self, progress:KType.Float01) -> None:
-        _w, _h = self.rect.size
-        _x, _y = self.get_position()
-        _bw = self.bar.rect.size[0]
-        self.progress = KBlock(
-            self.screen, 
-            (int(progress*_bw), _h), 
-            self.get_position(), 
-            self.color_progress
-        )
-        self.percent = KTextBlock(
-            self.screen, 
-            f"{str(int(progress*100))}%", 
-            _h,
-            (2*_h, _h),
-            (_x+_bw, _y),
-            self.color_pfg,
-            self.color_pbg
-        )
+        _h = self.rect.height
+        self.progress.set_size((int(progress*self.bar.rect.width), _h))
+        self.percent.set_text(f"{str(int(progress*100))}%")
 
     # Overridden
     def set_position(self, destination: Union[KType.Pos2D, None]) -> None:
@@ -570,4 +1032,65 @@ class KProgressBar(KObject):
         self.percent.rect.move_ip(*_shift)
 
     # Overridden
-    def copy(): pass
\ No newline at end of file
+    def copy(): pass
+
+
+class KHitMap():
+    # Screen space is cut into square buckets, each listing the entries
+    # whose rect touches it, so a lookup only looks at one short list.
+    BUCKET = 64
+
+    def __init__(self, size:Tuple[int, int], bucket:int = BUCKET):
+        self.bucket = bucket
+        self.num_buckets = (-(-size[0]//bucket), -(-size[1]//bucket))
+        self.buckets = [
+            list() for _ in range(self.num_buckets[0]*self.num_buckets[1])
+        ]
+
+    def add(
+        self,
+        rect:pygame.Rect,
+        target:Any,
+        tag:Any = None,
+        grid:Union["KGrid", None] = None
+        ) -> None:
+        if grid is None:
+            # Widgets keep the inclusive edges of KObject.is_enclosing.
+            _right, _bottom = rect.right+1, rect.bottom+1
+        else:
+            _right, _bottom = rect.right, rect.bottom
+        _entry = (rect.left, rect.top, _right, _bottom, target, tag, grid)
+        _b = self.bucket
+        _nbw, _nbh = self.num_buckets
+        _bx0, _bx1 = max(rect.left//_b, 0), min((_right-1)//_b, _nbw-1)
+        _by0, _by1 = max(rect.top//_b, 0), min((_bottom-1)//_b, _nbh-1)
+        for by in range(_by0, _by1+1):
+            for bx in range(_bx0, _bx1+1):
+                self.buckets[by*_nbw+bx].append(_entry)
+
+    def clear(self) -> None:
+        for bucket in self.buckets:
+            bucket.clear()
+
+    def query(
+        self,
+        position:KType.Pos2D
+        ) -> Union[Tuple[Any, Any, Union[Tuple[int, int], None]], None]:
+        _x, _y = int(position[0]), int(position[1])
+        _nbw, _nbh = self.num_buckets
+        _bx, _by = _x//self.bucket, _y//self.bucket
+        if not (0 <= _bx < _nbw and 0 <= _by < _nbh):
+            return None
+        for left, top, right, bottom, target, tag, grid \
+            in self.buckets[_by*_nbw+_bx]:
+            if not (left <= _x < right and top <= _y < bottom):
+                continue
+            if grid is not None:
+                # Grids may scroll under a fixed rect, so their cell is
+                # looked up against the live grid origin.
+                ind = grid.block_index_at((_x, _y))
+                if ind is not None:
+                    return target, tag, ind
+            elif target.clickable:
+                return target, tag, None
+        return None
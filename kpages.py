@@ -0,0 +1,842 @@
+import pygame
+import pygame.time
+import pygame.mixer
+import pygame.mouse
+from pygame.transform import rotate
+
+import os
+import sys
+import random
+from typing import TYPE_CHECKING, List, Tuple, Union
+
+from kpuzzles import ____PUZZLE01____
+from kauxiliaries import KType, KColor
+from knonograms import KNonograms
+from kobjects import KBlock, KTextBlock, KGrid, KButton, KHitMap
+from kverifiers import KVerifier
+from ksaves import KSaveFile
+from kjournal import KJournal
+
+if TYPE_CHECKING:
+    from kwindows import KWindow
+    from kcatalog import KCatalog
+
+
+class KPage():
+    def __init__(self, window:"KWindow"):
+        self.window = window
+        self.screen = window.screen
+        self.buttons = tuple()
+        self.hitmap = KHitMap(self.screen.get_size())
+        self.is_built = False
+
+    def build(self) -> None:
+        pass
+
+    def add_hits(self) -> None:
+        for button in self.buttons:
+            self.hitmap.add(button.rect, button)
+
+    def enter(self) -> None:
+        self.window.fill(self.window.color_bgdf)
+        for button in self.buttons:
+            button.draw()
+
+    def leave(self) -> None:
+        pass
+
+    def loop(self) -> str:
+        target_page = str()
+        while not target_page:
+            for event in self.window.events():
+                if event.type == pygame.QUIT:
+                    target_page = "exit_prompt"
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    hit = self.hitmap.query(event.pos)
+                    if hit is not None:
+                        target_page = hit[0].click()
+                    if target_page:
+                        break
+            self.window.update_display()
+        return target_page
+
+    @staticmethod
+    def make_popup(
+        screen:pygame.Surface,
+        text:str,
+        on_yes:object,
+        on_no:object
+        ) -> Tuple[KTextBlock, Tuple[KButton, KButton]]:
+        popup = KTextBlock(
+            screen,
+            text,
+            90,
+            (450, 250),
+            (0, 0),
+            is_centered = False
+        )
+        popup.set_center(screen.get_rect().center)
+        popup.inner_object.rect.move_ip(0, 10)
+        popup_buttons = (
+            KButton(
+                screen,
+                "Yes",
+                50,
+                (150, 50),
+                popup.get_position() + pygame.Vector2(30, 170),
+                KColor.name('black'),
+                KColor.name('white'),
+                on_pressed = lambda: on_yes,
+                on_released = None,
+            ),
+            KButton(
+                screen,
+                "No",
+                50,
+                (150, 50),
+                popup.get_position() + pygame.Vector2(270, 170),
+                KColor.name('black'),
+                KColor.name('white'),
+                on_pressed = lambda: on_no,
+                on_released = None
+            )
+        )
+        return popup, popup_buttons
+
+    def run(self) -> str:
+        if not self.is_built:
+            self.build()
+            self.add_hits()
+            self.is_built = True
+        self.enter()
+        target_page = self.loop()
+        self.leave()
+        return target_page
+
+
+class KMenuPage(KPage):
+    def build(self) -> None:
+        self.title = KGrid(
+            KTextBlock(
+                self.screen,
+                "",
+                50,
+                (50, 50),
+                (225, 100),
+                color_default = KColor(255, 255, 255, 0),
+                clickable = False
+            ),
+            (10, 1)
+        )
+        title = self.title
+        replace_title = lambda *ind_txt_clrn_tuples: title.replace(
+            *tuple((
+                (xi, yi),
+                KTextBlock(
+                    title.screen,
+                    txt,
+                    title.unit_origin.font_size,
+                    title.unit_origin.rect.size,
+                    title.unit_array[xi][yi].get_position(),
+                    KColor.name(clrn),
+                    title.unit_origin.color_default
+                )) for (xi, yi), txt, clrn in ind_txt_clrn_tuples
+            )
+        )
+        replace_title(
+            ((0,0), "N", 'black'),
+            ((1,0), "O", 'black'),
+            ((2,0), "N", 'black'),
+            ((3,0), "O", 'black'),
+            ((4,0), "G", 'black'),
+            ((5,0), "R", 'black'),
+            ((6,0), "A", 'black'),
+            ((7,0), "M", 'black'),
+            ((8,0), "S", 'black'),
+            ((9,0), "!", 'black')
+        )
+        for xi in range(title.num_blocks[0]):
+            char = title.unit_array[xi][0]
+            char.inner_object.surface = rotate(
+                char.inner_object.surface,
+                random.randint(-30, 30)
+            )
+        self.subtitle = KTextBlock(
+            self.screen,
+            f"- ver {self.window.VERSION}",
+            30,
+            (100, 30),
+            (700, 125),
+            color_default = KColor(255, 255, 255, 0),
+            clickable = False
+        )
+        self.subtitle.inner_object.surface = rotate(
+            self.subtitle.inner_object.surface, 30
+        )
+        self.color_bg = None
+        self.buttons = (
+            KButton(
+                self.screen,
+                "Start Game",
+                50,
+                (400, 50),
+                (275, 350),
+                KColor.name('blue').invert(),
+                KColor.name('blue'),
+                on_pressed = lambda: "start_game",
+                on_released = None
+            ),
+            KButton(
+                self.screen,
+                "History",
+                50,
+                (400, 50),
+                (275, 450),
+                KColor.name('blue').invert(),
+                KColor.name('blue'),
+                on_pressed = lambda: "history",
+                on_released = None
+            ),
+            KButton(
+                self.screen,
+                "Import Game",
+                50,
+                (400, 50),
+                (275, 550),
+                KColor.name('blue').invert(),
+                KColor.name('blue'),
+                on_pressed = lambda: "import_game",
+                on_released = None
+            ),
+            KButton(
+                self.screen,
+                "Exit Game",
+                50,
+                (400, 50),
+                (275, 650),
+                KColor.name('blue').invert(),
+                KColor.name('blue'),
+                on_pressed = lambda: "exit_prompt",
+                on_released = None
+            )
+        )
+
+    def intro(self) -> bool:
+        tc = 0
+        tnum = self.title.num_blocks[0]
+        if not self.window.play_music("opening.ogg"):
+            return False
+        pygame.time.set_timer(
+            self.window.BG_CHANGE, millis=self.window.BG_PERIOD, loops=6
+        )
+        is_skipped = False
+        while pygame.mixer.music.get_busy():
+            for event in self.window.events(timeout=self.window.BG_PERIOD):
+                if event.type == pygame.QUIT:
+                    sys.exit()
+                elif event.type in self.window.SKIP_EVENTS:
+                    is_skipped = True
+                    pygame.mixer.music.stop()
+                elif event.type == self.window.BG_CHANGE:
+                    self.color_bg = KColor.random()
+                    self.window.fill(self.color_bg)
+                    tc = tc + 2
+                    self.title.draw(
+                        *tuple( (x,0) for x in range(min(tc, tnum)) ),
+                        bdin = False,
+                        bdout = False
+                    )
+                    if tc > tnum:
+                        self.subtitle.draw()
+            self.window.update_display()
+        pygame.time.set_timer(self.window.BG_CHANGE, 0)
+        return not is_skipped
+
+    def draw_title(self) -> None:
+        self.window.fill(self.color_bg)
+        self.title.draw(
+            *tuple( (x,0) for x in range(self.title.num_blocks[0]) ),
+            bdin = False,
+            bdout = False
+        )
+        self.subtitle.draw()
+
+    # Overridden
+    def enter(self) -> None:
+        if self.color_bg is not None:
+            self.draw_title()
+        else:
+            if self.window.fast_start or not self.intro():
+                if self.color_bg is None:
+                    self.color_bg = KColor.random()
+                self.draw_title()
+            self.window.play_music("looping.ogg", loops=-1)
+        for button in self.buttons:
+            button.draw()
+
+
+class KGamePage(KPage):
+    MAIN_BUTTON = 'main'
+    CONTROL_BUTTON = 'control'
+    WHEEL_BUTTONS = (4, 5)
+    SCROLL_CELLS = 3
+    ZOOM_STEP = 1.25
+    VIEW_SIZE = (800, 800)
+    CELL_SIZE = 25
+    CELL_MIN = 15
+
+    def __init__(self, window:"KWindow"):
+        super(KGamePage, self).__init__(window)
+        self.puzzle = None
+        self.journal = None
+
+    def build(self) -> None:
+        if self.puzzle is None:
+            self.puzzle = self.saved_puzzle() or ____PUZZLE01____
+        self.build_board()
+        self.main_buttons = (
+            KButton(
+                self.screen,
+                "Back",
+                50,
+                (100, 50),
+                (25, 25),
+                KColor.name('white'),
+                KColor.name('black'),
+                on_pressed = lambda: "start_menu",
+                on_released = None
+            ),
+            KButton(
+                self.screen,
+                "Restart",
+                40,
+                (150, 50),
+                (575, 25),
+                KColor.name('white'),
+                KColor.name('black'),
+                on_pressed = lambda: "restart_prompt",
+                on_released = None
+            )
+        )
+        self.control_buttons = (
+            KButton(
+                self.screen,
+                "Undo",
+                40,
+                (100, 50),
+                (150, 25),
+                KColor.name('white'),
+                KColor.name('black'),
+                on_pressed = lambda nng: nng.undo(),
+                on_released = None
+            ),
+            KButton(
+                self.screen,
+                "Redo",
+                40,
+                (100, 50),
+                (275, 25),
+                KColor.name('white'),
+                KColor.name('black'),
+                on_pressed = lambda nng: nng.redo(),
+                on_released = None
+            ),
+            KButton(
+                self.screen,
+                "Reset",
+                40,
+                (150, 50),
+                (400, 25),
+                KColor.name('white'),
+                KColor.name('black'),
+                on_pressed = lambda nng: nng.reset(),
+                on_released = None
+            ),
+            KButton(
+                self.screen,
+                "CLR",
+                25,
+                (50, 50),
+                (25, 100),
+                KColor.name('white'),
+                KColor.name('black'),
+                on_pressed = lambda nng: nng.scm(KBlock.EMPTY),
+                on_released = None
+            ),
+            KButton(
+                self.screen,
+                "PNT",
+                25,
+                (50, 50),
+                (25, 175),
+                KColor.name('white'),
+                KColor.name('black'),
+                on_pressed = lambda nng: nng.scm(KBlock.FILLED),
+                on_released = None
+            ),
+            KButton(
+                self.screen,
+                "CRS",
+                25,
+                (50, 50),
+                (25, 250),
+                KColor.name('white'),
+                KColor.name('black'),
+                on_pressed = lambda nng: nng.scm(KBlock.CROSSED),
+                on_released = None
+            ),
+            KButton(
+                self.screen,
+                "DOT",
+                25,
+                (50, 50),
+                (25, 325),
+                KColor.name('white'),
+                KColor.name('black'),
+                on_pressed = lambda nng: nng.scm(KBlock.DOTTED),
+                on_released = None
+            ),
+            KButton(
+                self.screen,
+                "CHK",
+                25,
+                (50, 50),
+                (25, 400),
+                KColor.name('white'),
+                KColor.name('black'),
+                on_pressed = lambda nng: nng.scm(KBlock.CHECKED),
+                on_released = None
+            )
+        )
+        self.buttons = self.main_buttons + self.control_buttons
+        self.popup, self.popup_buttons = KPage.make_popup(
+            self.screen, "    Restart?    ", True, False
+        )
+        self.popup_hitmap = KHitMap(self.screen.get_size())
+        for button in self.popup_buttons:
+            self.popup_hitmap.add(button.rect, button)
+
+    def build_board(self) -> None:
+        hdict, vdict = self.puzzle
+        _num = (max(hdict) + 1, max(vdict) + 1)
+        _depth = (
+            max(len(nlist) for nlist in hdict.values()),
+            max(len(nlist) for nlist in vdict.values())
+        )
+        # Shrink the cells until board and clues fit the view, down to a
+        # readable minimum; past that the board and clue panels scroll.
+        _cell = min(
+            KGamePage.CELL_SIZE,
+            *(_view // (num + depth) for _view, num, depth in zip(
+                KGamePage.VIEW_SIZE, _num, _depth[::-1]
+            ))
+        )
+        _cell = max(_cell, KGamePage.CELL_MIN)
+        self.nng = KNonograms(
+            self.screen,
+            position = (100, 100),
+            num_mainblocks = _num,
+            num_numblocks = _depth,
+            size_mainblock = (_cell, _cell),
+            color_mainblocks = KColor.name('white'),
+            color_numblocks = KColor.name('yellow'),
+            view_size = KGamePage.VIEW_SIZE
+        )
+        self.nng.register(self.puzzle)
+        self.resume()
+
+    def progress_digests(self) -> List[Tuple[str, Union[bytes, None]]]:
+        progress = list()
+        for fpath, read_digest in (
+            (self.window.save_path, KSaveFile.digest),
+            (self.window.journal_path, KJournal.digest)
+        ):
+            if fpath is None:
+                continue
+            try:
+                digest = read_digest(fpath) if os.path.exists(fpath) else None
+            except (OSError, ValueError):
+                digest = None
+            progress.append((fpath, digest))
+        return progress
+
+    def saved_puzzle(self) -> Union[KType.Puzzle, None]:
+        # Saves and journals only keep the digest, so their puzzle is
+        # looked up in the catalog index.
+        catalog = self.window.open_catalog()
+        if catalog is None:
+            return None
+        for _, digest in self.progress_digests():
+            pid = None if digest is None else catalog.find(digest)
+            if pid is not None:
+                return catalog.load(pid)
+        return None
+
+    def select_puzzle(self, puzzle:KType.Puzzle) -> None:
+        self.puzzle = puzzle
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        digest = KVerifier(puzzle).digest()
+        for fpath, current in self.progress_digests():
+            KGamePage.shelve(fpath, digest, current)
+        if not self.is_built:
+            return
+        self.build_board()
+        self.hitmap.clear()
+        self.add_hits()
+
+    @staticmethod
+    def shelve(fpath:str, digest:bytes, current:Union[bytes, None]) -> None:
+        # The game in progress sits at fpath and every other puzzle's
+        # progress beside it, under that puzzle's digest.
+        if current == digest:
+            return
+        if current is not None:
+            os.replace(fpath, f"{fpath}.{current.hex()}")
+        _shelved = f"{fpath}.{digest.hex()}"
+        if os.path.exists(_shelved):
+            os.replace(_shelved, fpath)
+
+    # Overridden
+    def add_hits(self) -> None:
+        for mbutton in self.main_buttons:
+            self.hitmap.add(mbutton.rect, mbutton, KGamePage.MAIN_BUTTON)
+        for cbutton in self.control_buttons:
+            self.hitmap.add(cbutton.rect, cbutton, KGamePage.CONTROL_BUTTON)
+        self.nng.add_hits(self.hitmap)
+
+    # Overridden
+    def enter(self) -> None:
+        super(KGamePage, self).enter()
+        self.nng.draw_all()
+
+    def resume(self) -> bool:
+        is_resumed = False
+        _path = self.window.save_path
+        if _path is not None and os.path.exists(_path):
+            try:
+                # enter() draws the whole board right after.
+                KSaveFile.load(_path, self.nng, redraw=False)
+                is_resumed = True
+            except ValueError:
+                pass
+        self.journal = None
+        if self.window.journal_path is not None:
+            # A journal of the same puzzle is never older than the save.
+            self.journal = KJournal(self.window.journal_path)
+            if self.journal.attach(self.nng, redraw=False):
+                is_resumed = True
+        return is_resumed
+
+    # Overridden
+    def leave(self) -> None:
+        self.nng.end_stroke()
+        if self.window.save_path is not None:
+            try:
+                KSaveFile.save(self.window.save_path, self.nng)
+            except OSError:
+                # The previous save stays in place; leaving must not fail.
+                pass
+        if self.journal is not None:
+            # Off the input path, so the snapshot is on disk before the
+            # window can close.
+            self.journal.compact()
+            self.journal.flush()
+
+    # Overridden
+    def loop(self) -> str:
+        nng = self.nng
+        profiler = self.window.profiler
+        target_page = str()
+        while not target_page:
+            for event in self.window.events():
+                if event.type == pygame.QUIT:
+                    target_page = "exit_prompt"
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    if event.button in KGamePage.WHEEL_BUTTONS:
+                        continue
+                    hit = self.hitmap.query(event.pos)
+                    if hit is None:
+                        continue
+                    target, tag, ind = hit
+                    if tag == KGamePage.MAIN_BUTTON:
+                        target_page = target.click()
+                        break
+                    elif tag == KGamePage.CONTROL_BUTTON:
+                        with profiler.action(target.text.lower()):
+                            target.click(nng)
+                    elif tag == KNonograms.MAIN:
+                        with profiler.action('check'):
+                            nng.begin_stroke(ind)
+                        continue
+                    else:
+                        with profiler.action('check'):
+                            nng.click(tag, ind)
+                elif event.type == pygame.MOUSEMOTION:
+                    nng.extend_stroke(event.pos)
+                elif event.type == pygame.MOUSEBUTTONUP:
+                    with profiler.action('check'):
+                        nng.end_stroke()
+                elif event.type == pygame.MOUSEWHEEL:
+                    self.navigate_wheel(event)
+                elif event.type == pygame.KEYDOWN:
+                    self.navigate_key(event)
+            if nng.stroke_pending:
+                with profiler.action('check'):
+                    nng.flush_stroke()
+            self.window.update_display()
+            if self.journal is not None and self.journal.is_due() \
+                and not nng.is_stroking():
+                self.journal.compact()
+            if target_page == "restart_prompt":
+                if self.restart_prompt():
+                    nng.restart()
+                target_page = str()
+                self.enter()
+        return target_page
+
+    def navigate_wheel(self, event:pygame.event.Event) -> None:
+        nng = self.nng
+        if pygame.key.get_mods() & pygame.KMOD_CTRL:
+            nng.set_zoom(
+                nng.zoom * KGamePage.ZOOM_STEP**event.y,
+                pygame.mouse.get_pos()
+            )
+            return
+        _pos = pygame.mouse.get_pos()
+        _w, _h = nng.size_mainblock
+        if nng.view is not None \
+            and nng.panels[KNonograms.HORIZONTAL].collidepoint(_pos):
+            nng.scroll_clues(0, -event.y * _h)
+            return
+        if nng.view is not None \
+            and nng.panels[KNonograms.VERTICAL].collidepoint(_pos):
+            nng.scroll_clues(-event.y * _w, 0)
+            return
+        _w, _h = nng.grids[KNonograms.MAIN].unit_origin.rect.size
+        nng.scroll(
+            -event.x * KGamePage.SCROLL_CELLS * _w,
+            -event.y * KGamePage.SCROLL_CELLS * _h
+        )
+
+    def navigate_key(self, event:pygame.event.Event) -> None:
+        nng = self.nng
+        _w, _h = nng.grids[KNonograms.MAIN].unit_origin.rect.size
+        if event.key == pygame.K_LEFT:
+            nng.scroll(-_w, 0)
+        elif event.key == pygame.K_RIGHT:
+            nng.scroll(_w, 0)
+        elif event.key == pygame.K_UP:
+            nng.scroll(0, -_h)
+        elif event.key == pygame.K_DOWN:
+            nng.scroll(0, _h)
+        elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+            nng.set_zoom(nng.zoom * KGamePage.ZOOM_STEP)
+        elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            nng.set_zoom(nng.zoom / KGamePage.ZOOM_STEP)
+
+    def restart_prompt(self) -> bool:
+        self.popup.draw()
+        for button in self.popup_buttons:
+            button.draw()
+        proceed = None
+        while proceed is None:
+            for event in self.window.events():
+                if event.type == pygame.QUIT:
+                    proceed = False
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    hit = self.popup_hitmap.query(event.pos)
+                    if hit is not None:
+                        proceed = hit[0].click()
+                        break
+            self.window.update_display()
+        return proceed
+
+
+class KHistoryPage(KPage):
+    def build(self) -> None:
+        self.buttons = (
+            KButton(
+                self.screen,
+                "Back",
+                50,
+                (100, 50),
+                (25, 25),
+                KColor.name('white'),
+                KColor.name('black'),
+                on_pressed = lambda: "start_menu",
+                on_released = None,
+            ),
+        )
+
+
+class KImportPage(KPage):
+    ROWS = 14
+    ROW_TOP = 100
+    ROW_STEP = 55
+
+    def build(self) -> None:
+        self.catalog = self.window.open_catalog()
+        self.sizes = [None]
+        if self.catalog is not None:
+            self.sizes += self.catalog.sizes()
+        self.size_index = 0
+        self.first = 0
+        self.ids = None
+        self.control_buttons = (
+            KButton(
+                self.screen,
+                "Back",
+                50,
+                (100, 50),
+                (25, 25),
+                KColor.name('white'),
+                KColor.name('black'),
+                on_pressed = lambda: "start_menu",
+                on_released = None,
+            ),
+            KButton(
+                self.screen,
+                "<",
+                50,
+                (100, 50),
+                (450, 25),
+                KColor.name('white'),
+                KColor.name('black'),
+                on_pressed = lambda: self.turn(-1),
+                on_released = None,
+            ),
+            KButton(
+                self.screen,
+                ">",
+                50,
+                (100, 50),
+                (575, 25),
+                KColor.name('white'),
+                KColor.name('black'),
+                on_pressed = lambda: self.turn(1),
+                on_released = None,
+            )
+        )
+        self.list_entries()
+
+    def list_entries(self) -> None:
+        # Everything shown comes from the catalog index; a puzzle's clues
+        # are only read once it is picked.
+        catalog = self.catalog
+        if catalog is None:
+            self.status = KTextBlock(
+                self.screen,
+                "No puzzle catalog found",
+                40,
+                (600, 50),
+                (175, 450),
+                clickable = False
+            )
+            self.buttons = self.control_buttons[:1]
+            return
+        _size = self.sizes[self.size_index]
+        if self.ids is None:
+            self.ids = catalog.filter() if _size is None \
+                else catalog.filter(*_size)
+        _ids = self.ids[self.first:self.first+KImportPage.ROWS].tolist()
+        self.status = KTextBlock(
+            self.screen,
+            f"{self.first+len(_ids)}/{len(self.ids)}",
+            30,
+            (200, 50),
+            (725, 25),
+            clickable = False
+        )
+        entry_buttons = tuple(
+            KButton(
+                self.screen,
+                KImportPage.label(catalog, pid),
+                30,
+                (800, 50),
+                (75, KImportPage.ROW_TOP + i*KImportPage.ROW_STEP),
+                KColor.name('white'),
+                KColor.name('blue'),
+                on_pressed = lambda pid=pid: self.choose(pid),
+                on_released = None
+            ) for i, pid in enumerate(_ids)
+        )
+        self.buttons = self.control_buttons + (
+            KButton(
+                self.screen,
+                "All" if _size is None else f"{_size[0]}x{_size[1]}",
+                40,
+                (275, 50),
+                (150, 25),
+                KColor.name('white'),
+                KColor.name('black'),
+                on_pressed = self.next_size,
+                on_released = None,
+            ),
+        ) + entry_buttons
+
+    @staticmethod
+    def label(catalog:"KCatalog", pid:int) -> str:
+        _w, _h = catalog.size(pid)
+        _d = catalog.difficulty(pid)
+        _rating = "unsolvable" if _d < 0 else f"{round(100*_d)}% guessing"
+        return f"#{pid}  {_w}x{_h}  {catalog.name(pid)}  {_rating}"
+
+    def relist(self) -> str:
+        self.list_entries()
+        self.hitmap.clear()
+        self.add_hits()
+        self.enter()
+        return str()
+
+    def turn(self, step:int) -> str:
+        _first = self.first + step*KImportPage.ROWS
+        if 0 <= _first < len(self.ids):
+            self.first = _first
+            return self.relist()
+        return str()
+
+    def next_size(self) -> str:
+        self.size_index = (self.size_index + 1) % len(self.sizes)
+        self.first = 0
+        self.ids = None
+        return self.relist()
+
+    def choose(self, pid:int) -> str:
+        self.window.pages["start_game"].select_puzzle(self.catalog.load(pid))
+        return "start_game"
+
+    # Overridden
+    def enter(self) -> None:
+        super(KImportPage, self).enter()
+        self.status.draw()
+
+
+class KExitPage(KPage):
+    def build(self) -> None:
+        self.popup, self.buttons = KPage.make_popup(
+            self.screen, " Are you sure? ", self.window.EXIT, None
+        )
+
+    # Overridden
+    def enter(self) -> None:
+        self.popup.draw()
+        for button in self.buttons:
+            button.draw()
+
+    # Overridden
+    def loop(self) -> str:
+        target_page = None
+        while target_page is None:
+            for event in self.window.events():
+                if event.type == pygame.QUIT:
+                    target_page = self.window.EXIT
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    hit = self.hitmap.query(event.pos)
+                    if hit is not None:
+                        target_page = hit[0].click() \
+                            or self.window.previous_page
+                        break
+            self.window.update_display()
+        return target_page
@@ -0,0 +1,193 @@
+import pygame
+
+import csv
+import json
+import time
+import numpy
+from contextlib import nullcontext
+from typing import Any, Dict, List, Union
+
+from kauxiliaries import KColor, KFont
+
+
+class KProfiler():
+    CAPACITY = 4096
+    FRAME_FIELDS = ('start', 'wait', 'handle', 'flip')
+    CLICK_FIELDS = ('start', 'action', 'latency')
+    INPUT_EVENTS = (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN)
+    OVERLAY_KEY = pygame.K_F3
+    OVERLAY_SIZE = 16
+    OVERLAY_POSITION = (5, 5)
+    _NULL = nullcontext()
+
+    def __init__(self, enabled:bool = False, capacity:int = CAPACITY):
+        self.enabled = enabled
+        self.capacity = capacity
+        self.frames = numpy.zeros((capacity, len(KProfiler.FRAME_FIELDS)))
+        self.clicks = numpy.zeros((capacity, len(KProfiler.CLICK_FIELDS)))
+        self.click_names = [str()] * capacity
+        self.num_frames = 0
+        self.num_clicks = 0
+        self.show_overlay = False
+        self.overlay_rect = None
+        self.epoch = time.perf_counter()
+        self.t_wait = self.epoch
+        self.t_events = self.epoch
+        self.t_flip = self.epoch
+        self.t_input = None
+        self.action_name = str()
+        self.action_time = 0.
+
+    def begin_wait(self) -> None:
+        if self.enabled:
+            self.t_wait = time.perf_counter()
+
+    def end_wait(self, events:List[pygame.event.Event]) -> None:
+        if not self.enabled:
+            return
+        self.t_events = time.perf_counter()
+        for event in events:
+            if event.type in KProfiler.INPUT_EVENTS:
+                if self.t_input is None:
+                    self.t_input = self.t_events
+                if event.type == pygame.KEYDOWN \
+                    and event.key == KProfiler.OVERLAY_KEY:
+                    self.show_overlay = not self.show_overlay
+
+    def action(self, name:str) -> Any:
+        if not self.enabled:
+            return KProfiler._NULL
+        return KAction(self, name)
+
+    def begin_flip(self) -> None:
+        if self.enabled:
+            self.t_flip = time.perf_counter()
+
+    def end_flip(self) -> None:
+        if not self.enabled:
+            return
+        _now = time.perf_counter()
+        _row = self.frames[self.num_frames % self.capacity]
+        _row[:] = (
+            self.t_wait - self.epoch,
+            self.t_events - self.t_wait,
+            self.t_flip - self.t_events,
+            _now - self.t_flip
+        )
+        self.num_frames += 1
+        if self.t_input is not None:
+            _i = self.num_clicks % self.capacity
+            self.clicks[_i] = (
+                self.t_input - self.epoch, self.action_time, _now-self.t_input
+            )
+            self.click_names[_i] = self.action_name
+            self.num_clicks += 1
+            self.t_input = None
+            self.action_name = str()
+            self.action_time = 0.
+
+    def recent_frames(self) -> numpy.ndarray:
+        return self.frames[:min(self.num_frames, self.capacity)]
+
+    def recent_clicks(self) -> numpy.ndarray:
+        return self.clicks[:min(self.num_clicks, self.capacity)]
+
+    def summary(self) -> Dict[str, float]:
+        frames = self.recent_frames()
+        clicks = self.recent_clicks()
+        result = {'frames': self.num_frames, 'clicks': self.num_clicks}
+        if len(frames) > 1:
+            _span = frames[-1, 0] - frames[0, 0]
+            result['fps'] = (len(frames)-1) / _span if _span > 0 else 0.
+        if len(frames):
+            _busy = frames[:, 2] + frames[:, 3]
+            result['frame_p50'] = float(numpy.percentile(_busy, 50))
+            result['frame_p99'] = float(numpy.percentile(_busy, 99))
+        if len(clicks):
+            result['latency_p50'] = float(numpy.percentile(clicks[:, 2], 50))
+            result['latency_p99'] = float(numpy.percentile(clicks[:, 2], 99))
+        return result
+
+    def render_overlay(self) -> Union[pygame.Surface, None]:
+        if not (self.enabled and self.show_overlay):
+            return None
+        _s = self.summary()
+        _ms = lambda key: f"{_s[key]*1e3:.2f}" if key in _s else "-"
+        _lines = (
+            f"fps {_s.get('fps', 0.):.1f}",
+            f"frame p50 {_ms('frame_p50')} p99 {_ms('frame_p99')} ms",
+            f"click->px p50 {_ms('latency_p50')} p99 {_ms('latency_p99')} ms"
+        )
+        # Rendered straight from the font: these strings change every
+        # frame and would only churn the KFont text cache.
+        _font = KFont.get(KProfiler.OVERLAY_SIZE)
+        _surfaces = [
+            _font.render(line, True, KColor.name('white'))
+            for line in _lines
+        ]
+        overlay = pygame.Surface((
+            max(surface.get_width() for surface in _surfaces) + 8,
+            sum(surface.get_height() for surface in _surfaces) + 8
+        ))
+        overlay.fill(KColor.name('black'))
+        _y = 4
+        for surface in _surfaces:
+            overlay.blit(surface, (4, _y))
+            _y += surface.get_height()
+        return overlay
+
+    def rows(self) -> List[Dict[str, Any]]:
+        _rows = list()
+        _nf = min(self.num_frames, self.capacity)
+        _order = numpy.roll(numpy.arange(_nf), -(self.num_frames % _nf)) \
+            if self.num_frames > self.capacity else range(_nf)
+        for i in _order:
+            _rows.append(dict(
+                kind = 'frame',
+                **dict(zip(KProfiler.FRAME_FIELDS, self.frames[i].tolist()))
+            ))
+        _nc = min(self.num_clicks, self.capacity)
+        _order = numpy.roll(numpy.arange(_nc), -(self.num_clicks % _nc)) \
+            if self.num_clicks > self.capacity else range(_nc)
+        for i in _order:
+            _rows.append(dict(
+                kind = 'click',
+                name = self.click_names[i],
+                **dict(zip(KProfiler.CLICK_FIELDS, self.clicks[i].tolist()))
+            ))
+        return _rows
+
+    def dump(self, path:str) -> None:
+        _rows = self.rows()
+        _fields = ['kind', 'name'] + list(dict.fromkeys(
+            KProfiler.FRAME_FIELDS + KProfiler.CLICK_FIELDS
+        ))
+        with open(f"{path}.csv", 'w', newline='') as output:
+            writer = csv.DictWriter(output, _fields, restval='')
+            writer.writeheader()
+            writer.writerows(_rows)
+        with open(f"{path}.json", 'w') as output:
+            json.dump(
+                {'unit': 'seconds', 'summary': self.summary(), 'rows': _rows},
+                output,
+                indent = 2
+            )
+
+
+class KAction():
+    __slots__ = ('profiler', 'name', 't_start')
+
+    def __init__(self, profiler:KProfiler, name:str):
+        self.profiler = profiler
+        self.name = name
+        self.t_start = 0.
+
+    def __enter__(self) -> "KAction":
+        self.t_start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _p = self.profiler
+        if not _p.action_name:
+            _p.action_name = self.name
+        _p.action_time += time.perf_counter() - self.t_start
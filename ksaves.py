@@ -0,0 +1,225 @@
+import sys
+import mmap
+import struct
+import numpy
+from array import array
+from typing import TYPE_CHECKING, BinaryIO, Dict, Tuple
+
+from kfiles import KFile
+from khistory import KHistory, KCheckpoint
+
+if TYPE_CHECKING:
+    from knonograms import KNonograms
+
+SAVE_PATH = "nonograms.sav"
+
+
+class KSaveFile():
+    # | header | grid table | checkpoint table | grid states | words |
+    # | bounds | checkpoint cells |, every section 8-byte aligned and all
+    # integers little-endian. The grid states are raw uint8 (x, y) arrays.
+    # Each checkpoint opens its table rows with (0, number of keys).
+    MAGIC = b'KNGSAVE1'
+    VERSION = 1
+    ALIGN = 8
+    HEADER = struct.Struct('<8sHxxiIIII32s')
+    GRID = struct.Struct('<BxxxII')
+    CELLS = struct.Struct('<BxxxI')
+
+    @staticmethod
+    def aligned(offset:int) -> int:
+        return -(-offset//KSaveFile.ALIGN) * KSaveFile.ALIGN
+
+    @staticmethod
+    def words(values:array) -> bytes:
+        if sys.byteorder == 'big':
+            values = array(values.typecode, values)
+            values.byteswap()
+        return values.tobytes()
+
+    @staticmethod
+    def save(fpath:str, nng:"KNonograms") -> int:
+        return KFile.write_atomic(
+            fpath, lambda output: KSaveFile.write(output, nng)
+        )
+
+    @staticmethod
+    def write(output:BinaryIO, nng:"KNonograms") -> None:
+        if nng.verifier is None:
+            raise ValueError("no puzzle has been registered")
+        KSaveFile.pad(output)
+        history = nng.history
+        _tables = [
+            KSaveFile.GRID.pack(key, *states.shape)
+            for key, states in nng.states.items()
+        ]
+        _cells = list()
+        for checkpoint in history.checkpoints:
+            _tables.append(KSaveFile.CELLS.pack(0, len(checkpoint.cells)))
+            for key, (where, values) in checkpoint.cells.items():
+                _tables.append(KSaveFile.CELLS.pack(key, where.size))
+                _cells.append(where.astype('<u4').tobytes())
+                _cells.append(values.astype(numpy.uint8).tobytes())
+        _sections = [
+            KSaveFile.HEADER.pack(
+                KSaveFile.MAGIC,
+                KSaveFile.VERSION,
+                history.pih,
+                len(nng.states),
+                len(history.words),
+                len(history.bounds),
+                len(history.checkpoints),
+                nng.verifier.digest()
+            ),
+            b''.join(_tables)
+        ]
+        _sections += [
+            numpy.ascontiguousarray(states).tobytes()
+            for states in nng.states.values()
+        ]
+        _sections += [
+            KSaveFile.words(history.words), KSaveFile.words(history.bounds)
+        ]
+        _sections += _cells
+        for section in _sections:
+            KSaveFile.pad(output)
+            output.write(section)
+        KSaveFile.pad(output)
+
+    @staticmethod
+    def pad(output:BinaryIO) -> None:
+        output.write(b'\0' * (KSaveFile.aligned(output.tell())-output.tell()))
+
+    @staticmethod
+    def load(fpath:str, nng:"KNonograms", redraw:bool = True) -> None:
+        if nng.verifier is None:
+            raise ValueError("no puzzle has been registered")
+        with open(fpath, 'rb') as source:
+            buffer = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            history, states = KSaveFile.read(buffer, nng)
+            nng.end_stroke()
+            history.journal = nng.history.journal
+            nng.history = history
+            # One bulk copy out of the mapping, then a single full redraw.
+            nng.import_states(states, redraw)
+        except struct.error as error:
+            raise ValueError(f"{fpath} is truncated") from error
+        finally:
+            # The states are views of the mapping and have to go first.
+            states = None
+            buffer.close()
+        if history.journal is not None:
+            history.journal.compact()
+
+    @staticmethod
+    def digest(fpath:str, offset:int = 0) -> bytes:
+        with open(fpath, 'rb') as source:
+            source.seek(offset)
+            _header = source.read(KSaveFile.HEADER.size)
+        try:
+            magic, version, *_, digest = KSaveFile.HEADER.unpack(_header)
+        except struct.error as error:
+            raise ValueError(f"{fpath} is truncated") from error
+        if magic != KSaveFile.MAGIC or version != KSaveFile.VERSION:
+            raise ValueError("not a Nonograms save")
+        return digest
+
+    @staticmethod
+    def read(
+        buffer:mmap.mmap,
+        nng:"KNonograms",
+        offset:int = 0
+        ) -> Tuple[KHistory, Dict[int, numpy.ndarray]]:
+        magic, version, pih, num_grids, num_words, num_bounds, \
+            num_checkpoints, digest = \
+            KSaveFile.HEADER.unpack_from(buffer, offset)
+        if magic != KSaveFile.MAGIC or version != KSaveFile.VERSION:
+            raise ValueError("not a Nonograms save")
+        if digest != nng.verifier.digest():
+            raise ValueError("the save belongs to another puzzle")
+        _pos = KSaveFile.aligned(offset + KSaveFile.HEADER.size)
+        grids = list()
+        for _ in range(num_grids):
+            key, width, height = KSaveFile.GRID.unpack_from(buffer, _pos)
+            if key not in nng.states \
+                or nng.states[key].shape != (width, height):
+                raise ValueError("the save does not fit this board")
+            grids.append((key, width, height))
+            _pos += KSaveFile.GRID.size
+        layout = list()
+        for _ in range(num_checkpoints):
+            _, num_keys = KSaveFile.CELLS.unpack_from(buffer, _pos)
+            _pos += KSaveFile.CELLS.size
+            layout.append(list())
+            for _ in range(num_keys):
+                layout[-1].append(KSaveFile.CELLS.unpack_from(buffer, _pos))
+                _pos += KSaveFile.CELLS.size
+        _pos = _grids = KSaveFile.aligned(_pos)
+        for key, width, height in grids:
+            _pos = KSaveFile.aligned(_pos + width*height)
+        history = KHistory()
+        history.words = KSaveFile.read_words(buffer, _pos, num_words)
+        _pos = KSaveFile.aligned(_pos + 4*num_words)
+        history.bounds = KSaveFile.read_words(buffer, _pos, num_bounds)
+        _pos = KSaveFile.aligned(_pos + 4*num_bounds)
+        for entries in layout:
+            cells = dict()
+            for key, count in entries:
+                # Copied straight away: nothing but the states may keep a
+                # view of the mapping.
+                where = numpy.frombuffer(buffer, '<u4', count, _pos) \
+                    .astype(numpy.uint32)
+                _pos = KSaveFile.aligned(_pos + 4*count)
+                values = numpy.frombuffer(buffer, numpy.uint8, count, _pos) \
+                    .copy()
+                _pos = KSaveFile.aligned(_pos + count)
+                if key not in nng.states \
+                    or (where >= nng.states[key].size).any():
+                    raise ValueError("the save does not fit this board")
+                cells[key] = (where, values)
+            history.checkpoints.append(KCheckpoint.from_cells(cells))
+        history.pih = pih
+        if _pos > len(buffer) or len(history.words) != num_words \
+            or len(history.bounds) != num_bounds:
+            raise ValueError("the save is truncated")
+        KSaveFile.check(history, nng)
+        states = dict()
+        for key, width, height in grids:
+            states[key] = numpy.frombuffer(
+                buffer, numpy.uint8, width*height, _grids
+            ).reshape(width, height)
+            _grids = KSaveFile.aligned(_grids + width*height)
+        return history, states
+
+    @staticmethod
+    def check(history:KHistory, nng:"KNonograms") -> None:
+        # Undo, redo and replay index straight into these, so anything out
+        # of range would only fail later, half-way through a move.
+        bounds = numpy.asarray(history.bounds, numpy.int64)
+        words = numpy.asarray(history.words, numpy.uint32)
+        if not len(bounds) or bounds[0] != 0 or bounds[-1] != len(words) \
+            or (numpy.diff(bounds) < 0).any():
+            raise ValueError("the save has broken history bounds")
+        if not -1 <= history.pih < len(bounds)-1:
+            raise ValueError("the save has a broken history position")
+        keys = words >> 30
+        _resets = words[keys == KHistory.KEY_RESET] & KHistory.MAX_CHECKPOINT
+        if (_resets >= len(history.checkpoints)).any():
+            raise ValueError("the save has a broken history checkpoint")
+        for key in numpy.unique(keys[keys != KHistory.KEY_RESET]).tolist():
+            if key not in nng.states:
+                raise ValueError("the save does not fit this board")
+            width, height = nng.states[key].shape
+            _words = words[keys == key]
+            if (_words >> 18 & KHistory.MAX_INDEX >= width).any() \
+                or (_words >> 6 & KHistory.MAX_INDEX >= height).any():
+                raise ValueError("the save does not fit this board")
+
+    @staticmethod
+    def read_words(buffer:mmap.mmap, offset:int, count:int) -> array:
+        values = array('I')
+        values.frombytes(buffer[offset:offset+4*count])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
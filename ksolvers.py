@@ -0,0 +1,345 @@
+import time
+import heapq
+from typing import TYPE_CHECKING, List, Tuple, Union
+
+if TYPE_CHECKING:
+    from kauxiliaries import KType
+
+
+class KContradiction(Exception):
+    pass
+
+
+class KLineSolver():
+    # A line of n cells is a pair of bitmasks (filled, empty) where bit i
+    # is cell i. Placements are tracked over the n+1 cell boundaries, so
+    # every step below is a handful of big-int operations per clue.
+
+    @staticmethod
+    def reverse(bits:int, width:int) -> int:
+        if width <= 0:
+            return 0
+        return int(format(bits, f"0{width}b")[::-1], 2)
+
+    @staticmethod
+    def extend(seeds:int, steps:int) -> int:
+        # Grow every seed upwards through the contiguous run of step bits
+        # above it, using the carry of one addition to do the whole sweep.
+        _run = seeds | steps
+        return (_run & ~(_run + seeds)) | seeds
+
+    @staticmethod
+    def smear(bits:int, length:int) -> int:
+        # Set bit i+t for every set bit i and 0 <= t < length.
+        _out, _span = bits, 1
+        while _span < length:
+            _shift = min(_span, length - _span)
+            _out |= _out << _shift
+            _span += _shift
+        return _out
+
+    @staticmethod
+    def fits(free:int, length:int) -> int:
+        # Bit s is set when cells [s, s+length) are all in free.
+        _out, _span = free, 1
+        while _span < length:
+            _shift = min(_span, length - _span)
+            _out &= _out >> _shift
+            _span += _shift
+        return _out
+
+    @staticmethod
+    def prefixes(
+        clue:List[int],
+        n:int,
+        filled:int,
+        empty:int
+        ) -> Tuple[List[int], List[int]]:
+        _cells = (1 << n) - 1
+        _open = ~filled & _cells
+        _steps = _open << 1
+        _free = ~empty & _cells
+        reach = [KLineSolver.extend(1, _steps)]
+        starts = list()
+        for j, length in enumerate(clue):
+            _prev = reach[j] if j == 0 else (reach[j] & _open) << 1
+            _starts = _prev & KLineSolver.fits(_free, length)
+            starts.append(_starts)
+            reach.append(KLineSolver.extend(_starts << length, _steps))
+        return reach, starts
+
+    @staticmethod
+    def solve(
+        clue:List[int],
+        n:int,
+        filled:int = 0,
+        empty:int = 0
+        ) -> Tuple[int, int]:
+        _cells = (1 << n) - 1
+        k = len(clue)
+        fwd, starts = KLineSolver.prefixes(clue, n, filled, empty)
+        if not fwd[k] >> n & 1:
+            raise KContradiction("line cannot satisfy its clue")
+        _rev = KLineSolver.reverse
+        bwd, _ = KLineSolver.prefixes(
+            clue[::-1], n, _rev(filled, n), _rev(empty, n)
+        )
+        bwd = [_rev(bwd[k-j], n+1) for j in range(k+1)]
+        _open = ~filled & _cells
+        can_empty = 0
+        for j in range(k+1):
+            can_empty |= fwd[j] & (bwd[j] >> 1)
+        can_empty &= _open
+        can_fill = 0
+        for j, length in enumerate(clue):
+            _ends = bwd[k] if j == k-1 else (bwd[j+1] >> 1) & _open
+            _valid = starts[j] & (_ends >> length)
+            can_fill |= KLineSolver.smear(_valid, length)
+        can_fill &= _cells
+        return (
+            filled | (_cells & ~can_empty),
+            empty | (_cells & ~can_fill)
+        )
+
+
+class KSolver():
+    UNKNOWN = -1
+    EMPTY = 0
+    FILLED = 1
+
+    SOLVED = 'solved'
+    UNSOLVABLE = 'unsolvable'
+    TIMEOUT = 'timeout'
+
+    def __init__(self, puzzle:"KType.Puzzle"):
+        hdict, vdict = puzzle
+        self.width = max(hdict, default=-1) + 1
+        self.height = max(vdict, default=-1) + 1
+        self.col_clues = [
+            KSolver._clue(hdict.get(x, [])) for x in range(self.width)
+        ]
+        self.row_clues = [
+            KSolver._clue(vdict.get(y, [])) for y in range(self.height)
+        ]
+        self.row_filled = [0] * self.height
+        self.row_empty = [0] * self.height
+        self.col_filled = [0] * self.width
+        self.col_empty = [0] * self.width
+        self.dirty_rows = set(range(self.height))
+        self.dirty_cols = set(range(self.width))
+        self.nodes = 0
+        self.max_nodes = None
+        self.deadline = None
+
+    @staticmethod
+    def _clue(nlist:List[int]) -> List[int]:
+        return [int(num) for num in nlist if num > 0]
+
+    def get(self, xi:int, yi:int) -> int:
+        if self.row_filled[yi] >> xi & 1:
+            return KSolver.FILLED
+        if self.row_empty[yi] >> xi & 1:
+            return KSolver.EMPTY
+        return KSolver.UNKNOWN
+
+    def set(self, xi:int, yi:int, state:int) -> None:
+        _current = self.get(xi, yi)
+        if _current == state:
+            return
+        if _current != KSolver.UNKNOWN:
+            raise KContradiction(f"cell {(xi, yi)} is already decided")
+        if state == KSolver.FILLED:
+            self.row_filled[yi] |= 1 << xi
+            self.col_filled[xi] |= 1 << yi
+        elif state == KSolver.EMPTY:
+            self.row_empty[yi] |= 1 << xi
+            self.col_empty[xi] |= 1 << yi
+        else:
+            raise ValueError("a cell can only be set to FILLED or EMPTY")
+        self.dirty_rows.add(yi)
+        self.dirty_cols.add(xi)
+
+    def load(self, board:List[List[int]]) -> None:
+        for xi, column in enumerate(board):
+            for yi, state in enumerate(column):
+                if state != KSolver.UNKNOWN:
+                    self.set(xi, yi, state)
+
+    def num_decided(self) -> int:
+        return sum(
+            bin(f | e).count('1')
+            for f, e in zip(self.row_filled, self.row_empty)
+        )
+
+    def is_complete(self) -> bool:
+        _full = (1 << self.width) - 1
+        return all(
+            f | e == _full for f, e in zip(self.row_filled, self.row_empty)
+        )
+
+    def _scatter(
+        self,
+        changed:int,
+        index:int,
+        targets:List[int],
+        dirty:set
+        ) -> None:
+        _bit = 1 << index
+        while changed:
+            _low = changed & -changed
+            i = _low.bit_length() - 1
+            targets[i] |= _bit
+            dirty.add(i)
+            changed ^= _low
+
+    def propagate(self) -> bool:
+        while self.dirty_rows or self.dirty_cols:
+            while self.dirty_rows:
+                yi = self.dirty_rows.pop()
+                _f, _e = self.row_filled[yi], self.row_empty[yi]
+                f, e = KLineSolver.solve(
+                    self.row_clues[yi], self.width, _f, _e
+                )
+                if f & e:
+                    raise KContradiction(f"row {yi} is inconsistent")
+                self.row_filled[yi], self.row_empty[yi] = f, e
+                self._scatter(f ^ _f, yi, self.col_filled, self.dirty_cols)
+                self._scatter(e ^ _e, yi, self.col_empty, self.dirty_cols)
+            while self.dirty_cols:
+                xi = self.dirty_cols.pop()
+                _f, _e = self.col_filled[xi], self.col_empty[xi]
+                f, e = KLineSolver.solve(
+                    self.col_clues[xi], self.height, _f, _e
+                )
+                if f & e:
+                    raise KContradiction(f"column {xi} is inconsistent")
+                self.col_filled[xi], self.col_empty[xi] = f, e
+                self._scatter(f ^ _f, xi, self.row_filled, self.dirty_rows)
+                self._scatter(e ^ _e, xi, self.row_empty, self.dirty_rows)
+        return self.is_complete()
+
+    def solution(self) -> List[List[int]]:
+        return [
+            [self.get(xi, yi) for yi in range(self.height)]
+            for xi in range(self.width)
+        ]
+
+    def snapshot(self) -> Tuple:
+        return (
+            self.row_filled[:],
+            self.row_empty[:],
+            self.col_filled[:],
+            self.col_empty[:],
+            set(self.dirty_rows),
+            set(self.dirty_cols)
+        )
+
+    def restore(self, snapshot:Tuple) -> None:
+        (
+            self.row_filled,
+            self.row_empty,
+            self.col_filled,
+            self.col_empty,
+            self.dirty_rows,
+            self.dirty_cols
+        ) = tuple(
+            item.copy() for item in snapshot
+        )
+
+    def is_exhausted(self) -> bool:
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            return True
+        return self.deadline is not None \
+            and time.perf_counter() >= self.deadline
+
+    def candidates(self, limit:int) -> List[Tuple[int, int]]:
+        _rfull = (1 << self.width) - 1
+        _cfull = (1 << self.height) - 1
+        _rfree = [
+            ~(f | e) & _rfull
+            for f, e in zip(self.row_filled, self.row_empty)
+        ]
+        _ccount = [
+            self.height - bin(f | e).count('1')
+            for f, e in zip(self.col_filled, self.col_empty)
+        ]
+        cells = list()
+        for yi, free in enumerate(_rfree):
+            _rcount = bin(free).count('1')
+            while free:
+                _low = free & -free
+                xi = _low.bit_length() - 1
+                cells.append((_rcount + _ccount[xi], xi, yi))
+                free ^= _low
+        return [
+            (xi, yi) for _, xi, yi in heapq.nsmallest(limit, cells)
+        ]
+
+    def probe(self, limit:int) -> Union[Tuple[int, int, int], None]:
+        best, best_score = None, -1
+        for xi, yi in self.candidates(limit):
+            if self.is_exhausted():
+                break
+            if self.get(xi, yi) != KSolver.UNKNOWN:
+                continue
+            gains = dict()
+            for state in (KSolver.FILLED, KSolver.EMPTY):
+                _snapshot = self.snapshot()
+                self.nodes += 1
+                try:
+                    self.set(xi, yi, state)
+                    self.propagate()
+                    gains[state] = self.num_decided()
+                except KContradiction:
+                    gains[state] = None
+                self.restore(_snapshot)
+            _gf, _ge = gains[KSolver.FILLED], gains[KSolver.EMPTY]
+            if _gf is None and _ge is None:
+                raise KContradiction(f"cell {(xi, yi)} has no valid state")
+            if _gf is None or _ge is None:
+                # Learn the only consistent value and keep probing.
+                self.set(
+                    xi, yi, KSolver.EMPTY if _gf is None else KSolver.FILLED
+                )
+                self.propagate()
+                continue
+            _score = min(_gf, _ge)
+            if _score > best_score:
+                _state = KSolver.FILLED if _gf >= _ge else KSolver.EMPTY
+                best, best_score = (xi, yi, _state), _score
+        if best is not None and self.get(*best[:2]) != KSolver.UNKNOWN:
+            return None
+        return best
+
+    def search(
+        self,
+        max_nodes:Union[int, None] = None,
+        max_time:Union[float, None] = None,
+        probe_limit:int = 16
+        ) -> str:
+        self.nodes = 0
+        self.max_nodes = max_nodes
+        self.deadline = None if max_time is None \
+            else time.perf_counter() + max_time
+        stack = list()
+        while True:
+            if self.is_exhausted():
+                return KSolver.TIMEOUT
+            self.nodes += 1
+            try:
+                if self.propagate():
+                    return KSolver.SOLVED
+                branch = self.probe(probe_limit)
+                if branch is None:
+                    continue
+                xi, yi, state = branch
+                _other = KSolver.EMPTY if state == KSolver.FILLED \
+                    else KSolver.FILLED
+                stack.append((self.snapshot(), xi, yi, _other))
+                self.set(xi, yi, state)
+            except KContradiction:
+                if not stack:
+                    return KSolver.UNSOLVABLE
+                _snapshot, xi, yi, state = stack.pop()
+                self.restore(_snapshot)
+                self.set(xi, yi, state)
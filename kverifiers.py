@@ -0,0 +1,117 @@
+import numpy
+
+import hashlib
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from kauxiliaries import KType
+
+
+class KVerifier():
+    # Same value as KBlock.FILLED, kept here so batch jobs need no pygame.
+    FILLED = 1
+
+    def __init__(self, puzzle:"KType.Puzzle"):
+        hdict, vdict = puzzle
+        self.width = max(hdict, default=-1) + 1
+        self.height = max(vdict, default=-1) + 1
+        self.col_counts, self.col_clues = KVerifier.pack(hdict, self.width)
+        self.row_counts, self.row_clues = KVerifier.pack(vdict, self.height)
+        self.col_runs = [
+            tuple(int(num) for num in nlist[:count])
+            for nlist, count in zip(self.col_clues, self.col_counts)
+        ]
+        self.row_runs = [
+            tuple(int(num) for num in nlist[:count])
+            for nlist, count in zip(self.row_clues, self.row_counts)
+        ]
+
+    @staticmethod
+    def pack(
+        clues:Dict[int, List[int]],
+        num_lines:int
+        ) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        _lines = [
+            [num for num in clues.get(i, []) if num > 0]
+            for i in range(num_lines)
+        ]
+        _maxk = max((len(nlist) for nlist in _lines), default=0)
+        counts = numpy.zeros(num_lines, numpy.int32)
+        packed = numpy.zeros((num_lines, _maxk), numpy.int32)
+        for i, nlist in enumerate(_lines):
+            counts[i] = len(nlist)
+            packed[i, :len(nlist)] = nlist
+        return counts, packed
+
+    @staticmethod
+    def runs(
+        lines:numpy.ndarray,
+        max_runs:int
+        ) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        _nl, _n = lines.shape
+        _padded = numpy.zeros((_nl, _n+2), numpy.int8)
+        _padded[:, 1:-1] = lines
+        _edges = numpy.diff(_padded, axis=1)
+        _sl, _sp = numpy.nonzero(_edges == 1)
+        _, _ep = numpy.nonzero(_edges == -1)
+        counts = numpy.bincount(_sl, minlength=_nl)
+        _rank = numpy.arange(_sl.size) - (numpy.cumsum(counts)-counts)[_sl]
+        _keep = _rank < max_runs
+        lengths = numpy.zeros((_nl, max_runs), numpy.int32)
+        lengths[_sl[_keep], _rank[_keep]] = (_ep - _sp)[_keep]
+        return counts, lengths
+
+    @staticmethod
+    def line_runs(line:numpy.ndarray, filled:int = FILLED) -> Tuple[int]:
+        _padded = numpy.zeros(line.size+2, numpy.int8)
+        _padded[1:-1] = line == filled
+        _edges = numpy.flatnonzero(numpy.diff(_padded))
+        return tuple((_edges[1::2] - _edges[::2]).tolist())
+
+    @staticmethod
+    def match(
+        lines:numpy.ndarray,
+        counts:numpy.ndarray,
+        clues:numpy.ndarray
+        ) -> numpy.ndarray:
+        _n = lines.shape[-1]
+        _flat = lines.reshape(-1, _n)
+        _reps = _flat.shape[0] // max(counts.size, 1)
+        _counts, _lengths = KVerifier.runs(_flat, clues.shape[1])
+        ok = (_counts == numpy.tile(counts, _reps)) \
+            & (_lengths == numpy.tile(clues, (_reps, 1))).all(axis=1)
+        return ok.reshape(lines.shape[:-1])
+
+    def verify(
+        self,
+        board:numpy.ndarray,
+        filled:int = FILLED
+        ) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        _board = numpy.asarray(board)
+        if _board.shape[-2:] != (self.width, self.height):
+            raise ValueError("board shape does not match the puzzle")
+        _filled = _board == filled
+        col_ok = KVerifier.match(_filled, self.col_counts, self.col_clues)
+        row_ok = KVerifier.match(
+            numpy.swapaxes(_filled, -1, -2), self.row_counts, self.row_clues
+        )
+        return col_ok, row_ok
+
+    def is_solved(
+        self,
+        board:numpy.ndarray,
+        filled:int = FILLED
+        ) -> numpy.ndarray:
+        col_ok, row_ok = self.verify(board, filled)
+        return col_ok.all(axis=-1) & row_ok.all(axis=-1)
+
+    def digest(self) -> bytes:
+        # Hashes the packed clues, so the digest does not depend on how
+        # the puzzle dicts were written or ordered.
+        _hash = hashlib.sha256()
+        for array in (
+            self.col_counts, self.col_clues, self.row_counts, self.row_clues
+        ):
+            _hash.update(numpy.array(array.shape, '<i8').tobytes())
+            _hash.update(array.astype('<i4').tobytes())
+        return _hash.digest()
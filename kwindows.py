@@ -8,18 +8,20 @@ import pygame.event
 import pygame.mixer
 import pygame.mouse
 import pygame.display
-from pygame.transform import rotate
 
 import os
 import sys
-import random
+import struct
 import platform
-from typing import Union, Tuple
+from typing import Union, Tuple, List
 
-from kpuzzles import ____PUZZLE01____
-from kauxiliaries import KColor
-from knonograms import KNonograms
-from kobjects import KBlock, KTextBlock, KGrid, KGIF, KButton, KProgressBar
+from kauxiliaries import KColor, KFont
+from kobjects import KObject, KBlock, KGrid, KGIF, KProgressBar, KSprite
+from kpages import KPage, KMenuPage, KGamePage, KHistoryPage, KImportPage, KExitPage
+from kprofilers import KProfiler
+from kassets import KAssetPack, ASSET_PATH
+from ksaves import SAVE_PATH
+from kcatalog import KCatalog, CATALOG_PATH
 
 __version__ = '1.0.0'
 
@@ -27,11 +29,17 @@ __version__ = '1.0.0'
 class KWindow():
     MUSIC_END = pygame.USEREVENT + 1
     BG_CHANGE = pygame.USEREVENT + 2
+    BG_PERIOD = 167
+    OPENING_RESIDENT = 2
+    SKIP_EVENTS = (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN)
+    EXPOSE_EVENTS = tuple(
+        getattr(pygame, name) for name in ('VIDEOEXPOSE', 'WINDOWEXPOSED')
+        if hasattr(pygame, name)
+    )
 
+    VERSION = __version__
     EXIT = 'exit'
     _INITIALIZED = False
-    _PREVPAGE = None
-    _PHISTORY = None
     _WINCOUNT = 0
 
     def __init__(
@@ -39,7 +47,13 @@ class KWindow():
         screen_size:Union[Tuple[int, int], None] = None, 
         color_bgdf:KColor = KColor.name('white'),
         current_page:str = "start_menu",
-        fps:int = 30
+        fps:int = 30,
+        profile_path:Union[str, None] = None,
+        asset_path:Union[str, None] = ASSET_PATH,
+        fast_start:bool = False,
+        save_path:Union[str, None] = SAVE_PATH,
+        journal_path:Union[str, None] = None,
+        catalog_path:Union[str, None] = CATALOG_PATH
         ):
         pygame.init()
         pygame.font.init()
@@ -55,10 +69,46 @@ class KWindow():
                 raise OSError("program not supported by the OS")
         self.color_bgdf = color_bgdf
         self.current_page = current_page
+        self.previous_page = None
+        self.fast_start = fast_start
+        self.save_path = save_path
+        self.journal_path = journal_path
+        self.catalog_path = catalog_path
+        self.catalog = None
+        self.profile_path = profile_path
+        self.profiler = KProfiler(enabled = profile_path is not None)
         self.clock = pygame.time.Clock()
         self.fps = fps
         self.screen = pygame.display.set_mode(self.screen_size)
-        self.screen.fill(color_bgdf)
+        self.fill(color_bgdf)
+        self.assets = None
+        if asset_path is not None and os.path.exists(asset_path):
+            try:
+                self.assets = KAssetPack(asset_path)
+                self.assets.install_texts()
+            except (OSError, ValueError, KeyError, struct.error):
+                # A broken pack falls back to the original sources.
+                self.assets = None
+                KFont.clear()
+        if self.assets is not None and "icon" in self.assets:
+            _icon = self.assets.image("icon")
+        else:
+            _icon = KWindow.make_icon()
+        pygame.display.set_icon(_icon)
+        self.pages = dict()
+        self.register_page("start_menu", KMenuPage(self))
+        self.register_page("start_game", KGamePage(self))
+        self.register_page("history", KHistoryPage(self))
+        self.register_page("import_game", KImportPage(self))
+        self.register_page("exit_prompt", KExitPage(self))
+        if KWindow._WINCOUNT == 0:
+            print(f"Welcome to Nonograms - ver {__version__}")
+            print(f"By KindaOP - Last updated: Sep 2021")
+        KWindow._INITIALIZED = True
+        KWindow._WINCOUNT += 1
+
+    @staticmethod
+    def make_icon() -> pygame.Surface:
         _icon = pygame.Surface((32,32))
         icon_grid = KGrid(
             KBlock(
@@ -90,29 +140,111 @@ class KWindow():
             ( (3,2) , 'blue' )
         )
         icon_grid.draw_all()
-        pygame.display.set_icon(_icon)
-        if KWindow._WINCOUNT == 0:
-            print(f"Welcome to Nonograms - ver {__version__}")
-            print(f"By KindaOP - Last updated: Sep 2021")
-        KWindow._INITIALIZED = True
-        KWindow._WINCOUNT += 1
+        return _icon
 
     def __del__(self):
         KWindow._WINCOUNT -= 1
         if KWindow._WINCOUNT == 0:
-            pygame.mixer.music.stop()
-            pygame.mixer.music.unload()
+            if pygame.mixer.get_init():
+                pygame.mixer.music.stop()
+                pygame.mixer.music.unload()
+            KFont.clear()
+            KSprite.clear()
             pygame.font.quit()
             pygame.quit()
             print("Thank You for Playing My Game! - KindaOP")
 
-    def opening_window(self) -> None:
-        opening_gif = KGIF(
+    def register_page(self, name:str, page:KPage) -> None:
+        if name == KWindow.EXIT:
+            raise ValueError(f"'{KWindow.EXIT}' is reserved for leaving")
+        self.pages[name] = page
+
+    def fill(self, color:KColor) -> None:
+        self.screen.fill(color)
+        KObject.mark_dirty(self.screen.get_rect())
+
+    def update_display(self) -> None:
+        self.profiler.begin_flip()
+        rects = KObject.pop_dirty()
+        if self.profiler.overlay_rect is not None:
+            rects.append(self.profiler.overlay_rect)
+            self.profiler.overlay_rect = None
+        overlay = self.profiler.render_overlay()
+        if overlay is not None:
+            _rect = overlay.get_rect(topleft=KProfiler.OVERLAY_POSITION)
+            _rect = _rect.clip(self.screen.get_rect())
+            _under = self.screen.subsurface(_rect).copy()
+            self.screen.blit(overlay, _rect)
+            rects.append(_rect)
+        if rects:
+            pygame.display.update(rects)
+        if overlay is not None:
+            # Put the page back so the overlay never leaks into its drawing.
+            self.screen.blit(_under, _rect)
+            self.profiler.overlay_rect = _rect
+        self.profiler.end_flip()
+
+    def events(
+        self,
+        animating:bool = False,
+        timeout:Union[int, None] = None
+        ) -> List[pygame.event.Event]:
+        self.profiler.begin_wait()
+        if animating:
+            self.clock.tick(self.fps)
+            events = pygame.event.get()
+        else:
+            event = pygame.event.wait() if timeout is None \
+                else pygame.event.wait(timeout)
+            events = list() if event.type == pygame.NOEVENT \
+                else [event] + pygame.event.get()
+        for event in events:
+            if event.type in KWindow.EXPOSE_EVENTS:
+                KObject.mark_dirty(self.screen.get_rect())
+        self.profiler.end_wait(events)
+        return events
+
+    def load_music(self, name:str) -> None:
+        if self.assets is not None and f"sound/{name}" in self.assets:
+            pygame.mixer.music.load(self.assets.music(name), name)
+        else:
+            pygame.mixer.music.load(os.path.join(os.getcwd(), "Sounds", name))
+
+    def play_music(self, name:str, loops:int = 0) -> bool:
+        if not pygame.mixer.get_init():
+            return False
+        pygame.mixer.music.stop()
+        pygame.mixer.music.unload()
+        self.load_music(name)
+        pygame.mixer.music.play(loops=loops)
+        return True
+
+    def open_catalog(self) -> Union[KCatalog, None]:
+        # Only the index is read here; clue bodies stay in the mapping.
+        if self.catalog is None and self.catalog_path is not None \
+            and os.path.exists(self.catalog_path):
+            try:
+                self.catalog = KCatalog(self.catalog_path)
+            except (OSError, ValueError):
+                self.catalog_path = None
+        return self.catalog
+
+    def load_opening_gif(self) -> KGIF:
+        if self.assets is not None and "opening/0" in self.assets:
+            return KGIF(
+                self.screen, (100, 100), frames=self.assets.frames("opening")
+            )
+        return KGIF(
             self.screen, 
             (100, 100),
             os.path.join(os.getcwd(), "Images", "interesting.gif"),
-            Ts = 1
+            Ts = 1,
+            stream = True,
+            resident = KWindow.OPENING_RESIDENT
         )
+
+    def opening_window(self) -> None:
+        opening_gif = self.load_opening_gif()
         opening_gif.set_center(self.screen.get_rect().center)
         pbar = KProgressBar(
             self.screen,
@@ -121,562 +253,58 @@ class KWindow():
             progress = 0,
             color_pbg = self.color_bgdf
         )
-        n_frames = len(opening_gif.frames)
-        for i in range(n_frames):
-            self.clock.tick(self.fps)
-            for event in pygame.event.get():
+        n_frames = opening_gif.num_frames
+        i = 0
+        is_skipped = False
+        while i < n_frames and not is_skipped:
+            for event in self.events(animating=True):
                 if event.type == pygame.QUIT:
+                    opening_gif.close()
                     sys.exit()
+                elif event.type in KWindow.SKIP_EVENTS:
+                    is_skipped = True
             _p = (i+1)/n_frames
             opening_gif.surface.set_alpha(int(_p*255))
             opening_gif.draw()
-            opening_gif.step()
-            pbar.set_progress(_p)
+            # The bar follows decoding; the animation waits for late frames.
+            if opening_gif.step():
+                i += 1
+            pbar.set_progress(opening_gif.progress())
             pbar.draw()
-            pygame.display.flip()
+            self.update_display()
             pygame.time.delay(50)
-        pygame.time.delay(200)
-
-    def start_menu(self):
-        title = KGrid(
-            KTextBlock(
-                self.screen,
-                "",
-                50,
-                (50, 50),
-                (225, 100),
-                color_default = KColor(255, 255, 255, 0),
-                clickable = False
-            ),
-            (10, 1)
-        )
-        replace_title = lambda *ind_txt_clrn_tuples: title.replace(
-            *tuple((
-                (xi, yi),
-                KTextBlock(
-                    title.screen,
-                    txt,
-                    title.unit_origin.font_size,
-                    title.unit_origin.rect.size,
-                    title.unit_array[xi][yi].get_position(),
-                    KColor.name(clrn),
-                    title.unit_origin.color_default
-                )) for (xi, yi), txt, clrn in ind_txt_clrn_tuples
-            )
-        )
-        replace_title(
-            ((0,0), "N", 'black'),
-            ((1,0), "O", 'black'),
-            ((2,0), "N", 'black'),
-            ((3,0), "O", 'black'),
-            ((4,0), "G", 'black'),
-            ((5,0), "R", 'black'),
-            ((6,0), "A", 'black'),
-            ((7,0), "M", 'black'),
-            ((8,0), "S", 'black'),
-            ((9,0), "!", 'black')
-        )
-        tc = 0
-        tnum = title.num_blocks[0]
-        for xi in range(tnum):
-            char = title.unit_array[xi][0]
-            char.surface.set_alpha(0)
-            char.inner_object.surface = rotate(
-                char.inner_object.surface,
-                random.randint(-30, 30) 
-            )
-        subtitle = KTextBlock(
-            self.screen,
-            f"- ver {__version__}",
-            30,
-            (100, 30),
-            (700, 125),
-            color_default = KColor(255, 255, 255, 0),
-            clickable = False
-        )
-        subtitle.surface.set_alpha(0)
-        subtitle.inner_object.surface = rotate(
-            subtitle.inner_object.surface, 30
-        )
-        pygame.mixer.music.load(
-            os.path.join(os.getcwd(), "Sounds", "opening.ogg")
-        )
-        pygame.mixer.music.play(loops=0)
-        pygame.time.set_timer(KWindow.BG_CHANGE, millis=167,loops=6)
-        while pygame.mixer.music.get_busy():
-            self.clock.tick(self.fps)
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    sys.exit()
-                elif event.type == KWindow.BG_CHANGE:
-                    self.screen.fill(KColor.random())
-                    tc = tc + 2 
-                    if tc <= tnum:
-                        title.draw(
-                            *tuple( (x,0) for x in range(tc) ),
-                            bdin = False,
-                            bdout = False
-                        )
-                    else:
-                        title.draw(
-                            *tuple( (x,0) for x in range(tnum) ),
-                            bdin = False,
-                            bdout = False
-                        )
-                        subtitle.draw()
-            pygame.display.flip()
-        buttons = (
-            KButton(
-                self.screen,
-                "Start Game",
-                50,
-                (400, 50),
-                (275, 350),
-                KColor.name('blue').invert(),
-                KColor.name('blue'),
-                on_pressed = lambda: "start_game",
-                on_released = None
-            ),
-            KButton(
-                self.screen,
-                "History",
-                50,
-                (400, 50),
-                (275, 450),
-                KColor.name('blue').invert(),
-                KColor.name('blue'),
-                on_pressed = lambda: "history",
-                on_released = None
-            ),
-            KButton(
-                self.screen,
-                "Import Game",
-                50,
-                (400, 50),
-                (275, 550),
-                KColor.name('blue').invert(),
-                KColor.name('blue'),
-                on_pressed = lambda: "import_game",
-                on_released = None
-            ),
-            KButton(
-                self.screen,
-                "Exit Game",
-                50,
-                (400, 50),
-                (275, 650),
-                KColor.name('blue').invert(),
-                KColor.name('blue'),
-                on_pressed = lambda: "exit_prompt",
-                on_released = None
-            )
-        )
-        for button in buttons:
-            button.draw()
-        pygame.mixer.music.stop()
-        pygame.mixer.music.unload()
-        pygame.mixer.music.load(
-            os.path.join(os.getcwd(), "Sounds", "looping.ogg")
-        )
-        pygame.mixer.music.play(loops=-1)
-        target_page = str()
-        while not target_page:
-            self.clock.tick(self.fps)
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    target_page = "exit_prompt"
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    _mpos = pygame.mouse.get_pos()
-                    for button in buttons:
-                        clicked, target_page = button.check(_mpos)
-                        if clicked:
-                            break
-                    if clicked:
-                        continue
-            pygame.display.flip()
-        if target_page == "exit_prompt":
-            KWindow._PREVPAGE = "start_menu"
-        return target_page
-
-    def start_game(self):
-        self.screen.fill(self.color_bgdf)
-        nng = KNonograms(
-            self.screen,
-            position = (100, 100),
-            num_mainblocks = (25, 25),
-            num_numblocks = (7, 7),
-            size_mainblock = (25, 25),
-            color_mainblocks = KColor.name('white'),
-            color_numblocks = KColor.name('yellow')
-        )
-        nng.register(____PUZZLE01____)
-        main_buttons = (
-            KButton(
-                self.screen,
-                "Back",
-                50,
-                (100, 50),
-                (25, 25),
-                KColor.name('white'),
-                KColor.name('black'),
-                on_pressed = lambda: "start_menu",
-                on_released = None
-            ),
-            KButton(
-                self.screen,
-                "Restart",
-                40,
-                (150, 50),
-                (575, 25),
-                KColor.name('white'),
-                KColor.name('black'),
-                on_pressed = lambda: "restart_prompt",
-                on_released = None
-            )
-        )
-        control_buttons = (
-            KButton(
-                self.screen,
-                "Undo",
-                40,
-                (100, 50),
-                (150, 25),
-                KColor.name('white'),
-                KColor.name('black'),
-                on_pressed = lambda nng: nng.undo(),
-                on_released = None
-            ),
-            KButton(
-                self.screen,
-                "Redo",
-                40,
-                (100, 50),
-                (275, 25),
-                KColor.name('white'),
-                KColor.name('black'),
-                on_pressed = lambda nng: nng.redo(),
-                on_released = None
-            ),
-            KButton(
-                self.screen,
-                "Reset",
-                40,
-                (150, 50),
-                (400, 25),
-                KColor.name('white'),
-                KColor.name('black'),
-                on_pressed = lambda nng: nng.reset(),
-                on_released = None
-            ),
-            KButton(
-                self.screen,
-                "CLR",
-                25,
-                (50, 50),
-                (25, 100),
-                KColor.name('white'),
-                KColor.name('black'),
-                on_pressed = lambda nng: nng.scm(KBlock.EMPTY),
-                on_released = None
-            ),
-            KButton(
-                self.screen,
-                "PNT",
-                25,
-                (50, 50),
-                (25, 175),
-                KColor.name('white'),
-                KColor.name('black'),
-                on_pressed = lambda nng: nng.scm(KBlock.FILLED),
-                on_released = None
-            ),
-            KButton(
-                self.screen,
-                "CRS",
-                25,
-                (50, 50),
-                (25, 250),
-                KColor.name('white'),
-                KColor.name('black'),
-                on_pressed = lambda nng: nng.scm(KBlock.CROSSED),
-                on_released = None
-            ),
-            KButton(
-                self.screen,
-                "DOT",
-                25,
-                (50, 50),
-                (25, 325),
-                KColor.name('white'),
-                KColor.name('black'),
-                on_pressed = lambda nng: nng.scm(KBlock.DOTTED),
-                on_released = None
-            ),
-            KButton(
-                self.screen,
-                "CHK",
-                25,
-                (50, 50),
-                (25, 400),
-                KColor.name('white'),
-                KColor.name('black'),
-                on_pressed = lambda nng: nng.scm(KBlock.CHECKED),
-                on_released = None
-            )
-        )
-        for mbutton in main_buttons:
-            mbutton.draw()
-        for cbutton in control_buttons:
-            cbutton.draw()
-        nng.draw_all()
-        if KWindow._PHISTORY is not None:
-            nng.history, _tpih = KWindow._PHISTORY
-            KWindow._PHISTORY = None
-            for _ in range(_tpih+1):
-                nng.redo()
-        target_page = str()
-        while not target_page:
-            self.clock.tick(self.fps)
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    target_page = "exit_prompt"
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    _mpos = pygame.mouse.get_pos()
-                    for mbutton in main_buttons:
-                        checked, target_page = mbutton.check(_mpos)
-                        if checked:
-                            break
-                    if checked:
-                        break
-                    for cbutton in control_buttons:
-                        checked, _ = cbutton.check(_mpos, nng)
-                        if checked:
-                            print(nng.pih)
-                            break
-                    if checked:
-                        break
-                    checked = nng.check(_mpos)
-                    print(nng.pih)
-                    if checked:
-                        break
-                        
-            pygame.display.flip()
-        if target_page == "exit_prompt":
-            KWindow._PREVPAGE = "start_game"
-            KWindow._PHISTORY = (nng.history, nng.pih)
-        elif target_page == "restart_prompt":
-            popup = KTextBlock(
-                self.screen,
-                "    Restart?    ",
-                90,
-                (450, 250),
-                (0, 0),
-                is_centered = False
-            )
-            popup.set_center(self.screen.get_rect().center)
-            popup.inner_object.rect.move_ip(0, 10)
-            popup_buttons = (
-                KButton(
-                    self.screen,
-                    "Yes",
-                    50,
-                    (150, 50),
-                    popup.get_position() + pygame.Vector2(30, 170),
-                    KColor.name('black'),
-                    KColor.name('white'),
-                    on_pressed = lambda: True,
-                    on_released = None,
-                ),
-                KButton(
-                    self.screen,
-                    "No",
-                    50,
-                    (150, 50),
-                    popup.get_position() + pygame.Vector2(270, 170),
-                    KColor.name('black'),
-                    KColor.name('white'),
-                    on_pressed = lambda: False,
-                    on_released = None
-                )
-            )
-            popup.draw()
-            for button in popup_buttons:
-                button.draw()
-            proceed = None
-            while proceed is None:
-                self.clock.tick(self.fps)
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        proceed = False
-                    elif event.type == pygame.MOUSEBUTTONDOWN:
-                        _mpos = pygame.mouse.get_pos()
-                        for button in popup_buttons:
-                            checked, proceed = button.check(_mpos)
-                            if checked:
-                                break
-                        if checked:
-                            break
-                pygame.display.flip()
-            KWindow._PHISTORY = (
-                nng.history, 
-                nng.pih
-            ) if not proceed else None
-            target_page = "start_game"
-        return target_page
-
-    def history(self):
-        self.screen.fill(self.color_bgdf)
-        buttons = (
-            KButton(
-                self.screen,
-                "Back",
-                50,
-                (100, 50),
-                (25, 25),
-                KColor.name('white'),
-                KColor.name('black'),
-                on_pressed = lambda: "start_menu",
-                on_released = None,
-            ),
-        )
-        for button in buttons:
-            button.draw()
-        target_page = str()
-        while not target_page:
-            self.clock.tick(self.fps)
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    target_page = "exit_prompt"
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    _mpos = pygame.mouse.get_pos()
-                    for button in buttons:
-                        clicked, target_page = button.check(_mpos)
-                        if clicked:
-                            break
-                    if clicked:
-                        break
-            pygame.display.flip()
-        if target_page == "exit_prompt":
-            KWindow._PREVPAGE = "history"
-        return target_page
-
-    def import_game(self):
-        self.screen.fill(self.color_bgdf)
-        buttons = (
-            KButton(
-                self.screen,
-                "Back",
-                50,
-                (100, 50),
-                (25, 25),
-                KColor.name('white'),
-                KColor.name('black'),
-                on_pressed = lambda: "start_menu",
-                on_released = None,
-            ),
-        )
-        for button in buttons:
-            button.draw()
-        target_page = str()
-        while not target_page:
-            self.clock.tick(self.fps)
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    target_page = "exit_prompt"
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    _mpos = pygame.mouse.get_pos()
-                    for button in buttons:
-                        clicked, target_page = button.check(_mpos)
-                        if clicked:
-                            break
-                    if clicked:
-                        continue
-            pygame.display.flip()
-        if target_page == "exit_prompt":
-            KWindow._PREVPAGE = "import_game"
-        return target_page
-
-    def exit_prompt(self):
-        popup = KTextBlock(
-            self.screen,
-            " Are you sure? ",
-            90,
-            (450, 250),
-            (0, 0),
-            is_centered = False
-        )
-        popup.set_center(self.screen.get_rect().center)
-        popup.inner_object.rect.move_ip(0, 10)
-        popup_buttons = (
-            KButton(
-                self.screen,
-                "Yes",
-                50,
-                (150, 50),
-                popup.get_position() + pygame.Vector2(30, 170),
-                KColor.name('black'),
-                KColor.name('white'),
-                on_pressed = lambda: KWindow.EXIT,
-                on_released = None,
-            ),
-            KButton(
-                self.screen,
-                "No",
-                50,
-                (150, 50),
-                popup.get_position() + pygame.Vector2(270, 170),
-                KColor.name('black'),
-                KColor.name('white'),
-                on_pressed = lambda: KWindow._PREVPAGE,
-                on_released = None
-            )
-        )
-        popup.draw()
-        for button in popup_buttons:
-            button.draw()
-        target_page = str()
-        while not target_page:
-            self.clock.tick(self.fps)
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    target_page = KWindow.EXIT
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    _mpos = pygame.mouse.get_pos()
-                    for button in popup_buttons:
-                        checked, target_page = button.check(_mpos)
-                        if checked:
-                            break
-                    if checked:
-                        break
-            pygame.display.flip()
-        if target_page == KWindow._PREVPAGE:
-            KWindow._PREVPAGE = None
-        return target_page
+        opening_gif.close()
+        if not is_skipped:
+            pygame.time.delay(200)
 
     def closing_window(self) -> None:
-        pygame.mixer.music.stop()
-        pygame.mixer.music.unload()
-        pygame.mixer.music.load(
-            os.path.join(os.getcwd(), "Sounds", "closing.ogg")
-        )
-        pygame.mixer.music.play(loops=0)
+        self.fill(self.color_bgdf)
+        if self.fast_start or not self.play_music("closing.ogg"):
+            self.update_display()
+            return
         pygame.mixer.music.set_endevent(KWindow.MUSIC_END)
-        self.screen.fill(self.color_bgdf)
         is_staying = True
         while is_staying:
-            self.clock.tick(self.fps)
-            for event in pygame.event.get():
+            for event in self.events():
                 if event.type == pygame.QUIT:
                     is_staying = False
                 elif event.type == KWindow.MUSIC_END:
                     is_staying = False
-            pygame.display.flip()
+            self.update_display()
 
     def run(self) -> None:
-        self.opening_window()
-        while self.current_page != KWindow.EXIT:
-            self.clock.tick(self.fps)
-            self.current_page = eval(
-                str().join(["self.", self.current_page, "()"])
-            )
-        self.closing_window()
\ No newline at end of file
+        if self.current_page not in self.pages:
+            raise ValueError(f"no page is registered as '{self.current_page}'")
+        try:
+            if not self.fast_start:
+                self.opening_window()
+            while self.current_page != KWindow.EXIT:
+                self.clock.tick(self.fps)
+                target_page = self.pages[self.current_page].run()
+                if target_page != self.current_page:
+                    self.previous_page = self.current_page
+                self.current_page = target_page
+            self.closing_window()
+        finally:
+            if self.profiler.enabled:
+                self.profiler.dump(self.profile_path)
\ No newline at end of file
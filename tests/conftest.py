@@ -0,0 +1,28 @@
+import os
+import sys
+import random
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import pytest
+
+from kobjects import KBlock
+from knonograms import KNonograms
+from kbenchmarks import make_nonograms
+
+
+@pytest.fixture(scope='session')
+def screen() -> pygame.Surface:
+    pygame.init()
+    yield pygame.display.set_mode((1000, 1000))
+    pygame.quit()
+
+
+@pytest.fixture
+def nng(screen:pygame.Surface) -> KNonograms:
+    KNonograms.CURRENT_MODE = KBlock.FILLED
+    random.seed(0)
+    return make_nonograms(screen)
@@ -0,0 +1,102 @@
+import struct
+import numpy
+import pytest
+
+from knonograms import KNonograms
+from ksaves import KSaveFile
+from kcatalog import KCatalog, make_puzzle, builtin_puzzles
+from kverifiers import KVerifier
+from kbenchmarks import make_nonograms, fill_history
+
+
+def test_save_round_trip(nng:KNonograms, screen, tmp_path):
+    fill_history(nng, 500, 60)
+    for _ in range(7):
+        nng.undo()
+    fpath = str(tmp_path / "round.sav")
+    assert KSaveFile.save(fpath, nng) > 0
+    assert not (tmp_path / "round.sav.tmp").exists()
+    assert KSaveFile.digest(fpath) == nng.verifier.digest()
+    other = make_nonograms(screen)
+    KSaveFile.load(fpath, other)
+    assert other.pih == nng.pih
+    assert other.history.words == nng.history.words
+    assert other.history.bounds == nng.history.bounds
+    for key, states in nng.states.items():
+        numpy.testing.assert_array_equal(other.states[key], states)
+    for mine, theirs in zip(
+        nng.history.checkpoints, other.history.checkpoints
+    ):
+        for key, (where, values) in mine.cells.items():
+            numpy.testing.assert_array_equal(theirs.cells[key][0], where)
+            numpy.testing.assert_array_equal(theirs.cells[key][1], values)
+    for _ in range(7):
+        nng.redo()
+        other.redo()
+    for key, states in nng.states.items():
+        numpy.testing.assert_array_equal(other.states[key], states)
+
+
+@pytest.mark.parametrize('field, value', [
+    (2, 10**6),
+    (2, -2),
+    (5, 0),
+])
+def test_save_rejects_broken_history(nng, screen, tmp_path, field, value):
+    fill_history(nng, 50, 20)
+    fpath = str(tmp_path / "broken.sav")
+    KSaveFile.save(fpath, nng)
+    data = bytearray(open(fpath, 'rb').read())
+    header = list(KSaveFile.HEADER.unpack_from(data))
+    header[field] = value
+    KSaveFile.HEADER.pack_into(data, 0, *header)
+    with open(fpath, 'wb') as output:
+        output.write(data)
+    other = make_nonograms(screen)
+    with pytest.raises(ValueError):
+        KSaveFile.load(fpath, other)
+    assert other.pih == -1
+
+
+def test_save_rejects_bad_checkpoint(nng, screen, tmp_path):
+    fill_history(nng, 50, 20)
+    fpath = str(tmp_path / "broken.sav")
+    KSaveFile.save(fpath, nng)
+    _reset = next(
+        word for word in nng.history.words if word >> 30 == 3
+    )
+    data = open(fpath, 'rb').read()
+    _pos = data.find(struct.pack('<I', _reset))
+    data = data[:_pos] + struct.pack('<I', 3 << 30 | 999) + data[_pos+4:]
+    with open(fpath, 'wb') as output:
+        output.write(data)
+    with pytest.raises(ValueError):
+        KSaveFile.load(fpath, make_nonograms(screen))
+
+
+def test_catalog_round_trip(tmp_path):
+    puzzles = builtin_puzzles() + [
+        (f"random{size}", make_puzzle(size, size)) for size in (5, 12, 30)
+    ]
+    fpath = str(tmp_path / "round.kcat")
+    assert KCatalog.write(fpath, puzzles) == len(puzzles)
+    catalog = KCatalog(fpath)
+    try:
+        assert len(catalog) == len(puzzles)
+        for pid, (name, puzzle) in enumerate(puzzles):
+            verifier = KVerifier(puzzle)
+            assert catalog.name(pid) == name
+            assert catalog.size(pid) == (verifier.width, verifier.height)
+            assert KVerifier(catalog.load(pid)).digest() == verifier.digest()
+            assert catalog.find(verifier.digest()) is not None
+        assert catalog.difficulty(len(puzzles)-1) >= 0
+        assert catalog.filter(width=12).tolist() == [len(puzzles)-2]
+    finally:
+        catalog.close()
+
+
+def test_catalog_rejects_other_files(tmp_path):
+    fpath = tmp_path / "other.kcat"
+    fpath.write_bytes(b'not a catalog at all')
+    with pytest.raises(ValueError):
+        KCatalog(str(fpath))
@@ -0,0 +1,79 @@
+import numpy
+
+from kobjects import KBlock
+from knonograms import KNonograms
+
+
+def snapshot(nng:KNonograms) -> dict:
+    return nng.export_states()
+
+
+def assert_states(nng:KNonograms, expected:dict):
+    for key, states in expected.items():
+        numpy.testing.assert_array_equal(nng.states[key], states)
+
+
+def play(nng:KNonograms) -> list:
+    # Clicks, a stroke and two resets, with the board after every step.
+    boards = [snapshot(nng)]
+    for ind in ((0, 0), (1, 0), (2, 3)):
+        nng.click(KNonograms.MAIN, ind)
+        boards.append(snapshot(nng))
+    grid = nng.grids[KNonograms.HORIZONTAL]
+    _w, _h = grid.states.shape
+    nng.click(KNonograms.HORIZONTAL, next(
+        (xi, yi) for xi in range(_w) for yi in range(_h)
+        if grid.is_clickable(xi, yi)
+    ))
+    boards.append(snapshot(nng))
+    nng.reset()
+    boards.append(snapshot(nng))
+    KNonograms.CURRENT_MODE = KBlock.CROSSED
+    nng.click(KNonograms.MAIN, (4, 4))
+    boards.append(snapshot(nng))
+    nng.begin_stroke((5, 5))
+    grid = nng.grids[KNonograms.MAIN]
+    _w, _h = grid.unit_origin.rect.size
+    nng.extend_stroke((grid.rect.left + 5*_w + 1, grid.rect.top + 9*_h + 1))
+    nng.end_stroke()
+    boards.append(snapshot(nng))
+    nng.reset()
+    boards.append(snapshot(nng))
+    KNonograms.CURRENT_MODE = KBlock.FILLED
+    nng.click(KNonograms.MAIN, (7, 7))
+    boards.append(snapshot(nng))
+    return boards
+
+
+def test_undo_redo_across_resets(nng:KNonograms):
+    boards = play(nng)
+    assert len(nng.history) == len(boards) - 1
+    for i in range(len(boards)-2, -1, -1):
+        nng.undo()
+        assert nng.pih == i - 1
+        assert_states(nng, boards[i])
+    nng.undo()
+    assert_states(nng, boards[0])
+    for i in range(1, len(boards)):
+        nng.redo()
+        assert_states(nng, boards[i])
+    nng.redo()
+    assert_states(nng, boards[-1])
+
+
+def test_new_step_after_undo_drops_later_checkpoints(nng:KNonograms):
+    boards = play(nng)
+    # Back before the second reset, then branch off.
+    for _ in range(3):
+        nng.undo()
+    assert_states(nng, boards[-4])
+    nng.click(KNonograms.MAIN, (9, 9))
+    assert len(nng.history.checkpoints) == 1
+    assert len(nng.history) == nng.pih + 1
+    for _ in range(nng.pih + 1):
+        nng.undo()
+    assert_states(nng, boards[0])
+    for _ in range(len(nng.history)):
+        nng.redo()
+    assert nng.states[KNonograms.MAIN][9, 9] == KBlock.FILLED
+    assert nng.states[KNonograms.MAIN][4, 4] == KBlock.CROSSED
@@ -0,0 +1,69 @@
+import os
+import numpy
+
+from knonograms import KNonograms
+from kjournal import KJournal
+from kbenchmarks import make_nonograms, fill_history
+
+
+def record(nng:KNonograms, fpath:str) -> int:
+    journal = KJournal(fpath)
+    journal.attach(nng, False)
+    fill_history(nng, 40, 15)
+    nng.undo()
+    nng.undo()
+    nng.redo()
+    journal.close()
+    return os.path.getsize(fpath)
+
+
+def test_journal_replay(nng:KNonograms, screen, tmp_path):
+    fpath = str(tmp_path / "play.wal")
+    record(nng, fpath)
+    other = make_nonograms(screen)
+    journal = KJournal(fpath)
+    assert journal.attach(other, False) == 43
+    journal.close()
+    assert other.pih == nng.pih
+    assert other.history.words == nng.history.words
+    for key, states in nng.states.items():
+        numpy.testing.assert_array_equal(other.states[key], states)
+
+
+def test_journal_replay_stops_at_torn_tail(nng:KNonograms, screen, tmp_path):
+    fpath = str(tmp_path / "torn.wal")
+    _size = record(nng, fpath)
+    # The last record is a bare redo: cutting into it leaves the board as
+    # it was after the second undo.
+    os.truncate(fpath, _size - KJournal.RECORD.size + 3)
+    nng.undo()
+    other = make_nonograms(screen)
+    journal = KJournal(fpath)
+    assert journal.attach(other, False) == 42
+    journal.close()
+    assert os.path.getsize(fpath) == _size - KJournal.RECORD.size
+    assert other.pih == nng.pih
+    for key, states in nng.states.items():
+        numpy.testing.assert_array_equal(other.states[key], states)
+
+
+def test_journal_replay_stops_at_corrupt_record(nng, screen, tmp_path):
+    fpath = str(tmp_path / "corrupt.wal")
+    _size = record(nng, fpath)
+    with open(fpath, 'r+b') as output:
+        output.seek(_size - KJournal.RECORD.size + 4)
+        output.write(b'\xff\xff\xff\xff')
+    other = make_nonograms(screen)
+    journal = KJournal(fpath)
+    assert journal.attach(other, False) == 42
+    journal.close()
+    assert other.pih == nng.pih - 1
+
+
+def test_journal_starts_over_from_a_foreign_file(nng, tmp_path):
+    fpath = tmp_path / "foreign.wal"
+    fpath.write_bytes(b'\0' * 100)
+    journal = KJournal(str(fpath))
+    assert journal.attach(nng, False) == 0
+    journal.close()
+    assert KJournal.digest(str(fpath)) == nng.verifier.digest()
@@ -0,0 +1,86 @@
+import itertools
+import numpy
+import pytest
+
+from ksolvers import KLineSolver, KSolver, KContradiction
+from kverifiers import KVerifier
+from kcatalog import make_puzzle
+
+
+def runs(cells) -> tuple:
+    return tuple(
+        len(list(group)) for filled, group in itertools.groupby(cells)
+        if filled
+    )
+
+
+def lines(n:int) -> dict:
+    clues = dict()
+    for cells in itertools.product((0, 1), repeat=n):
+        clues.setdefault(runs(cells), list()).append(cells)
+    return clues
+
+
+@pytest.mark.parametrize('n', range(1, 7))
+def test_line_solver_matches_brute_force(n:int):
+    clues = lines(n)
+    # Every clue that fits the line, plus one that never does.
+    for clue in list(clues) + [(n+1,)]:
+        solutions = clues.get(clue, [])
+        for known in itertools.product((None, 0, 1), repeat=n):
+            filled = sum(1 << i for i, s in enumerate(known) if s == 1)
+            empty = sum(1 << i for i, s in enumerate(known) if s == 0)
+            _fits = [
+                cells for cells in solutions
+                if all(s is None or s == c for s, c in zip(known, cells))
+            ]
+            if not _fits:
+                with pytest.raises(KContradiction):
+                    KLineSolver.solve(list(clue), n, filled, empty)
+                continue
+            _filled = sum(
+                1 << i for i in range(n) if all(c[i] for c in _fits)
+            )
+            _empty = sum(
+                1 << i for i in range(n) if not any(c[i] for c in _fits)
+            )
+            assert KLineSolver.solve(list(clue), n, filled, empty) \
+                == (_filled, _empty)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_verifier_matches_brute_force(seed:int):
+    rng = numpy.random.default_rng(seed)
+    width, height = rng.integers(1, 8, 2)
+    image = (rng.random((width, height)) < 0.5).astype(numpy.uint8)
+    puzzle = (
+        {xi: list(runs(image[xi, :])) or [0] for xi in range(width)},
+        {yi: list(runs(image[:, yi])) or [0] for yi in range(height)}
+    )
+    verifier = KVerifier(puzzle)
+    boards = numpy.stack(
+        [image] + [
+            rng.integers(0, 4, (width, height)).astype(numpy.uint8)
+            for _ in range(30)
+        ]
+    )
+    col_ok, row_ok = verifier.verify(boards)
+    for i, board in enumerate(boards):
+        _filled = board == KVerifier.FILLED
+        assert col_ok[i].tolist() == [
+            runs(_filled[xi, :]) == verifier.col_runs[xi]
+            for xi in range(width)
+        ]
+        assert row_ok[i].tolist() == [
+            runs(_filled[:, yi]) == verifier.row_runs[yi]
+            for yi in range(height)
+        ]
+    assert verifier.is_solved(boards)[0]
+
+
+def test_solver_finds_the_generated_picture():
+    puzzle = make_puzzle(15, seed=3)
+    solver = KSolver(puzzle)
+    assert solver.search(max_time=10) == KSolver.SOLVED
+    _board = numpy.array(solver.solution(), numpy.uint8)
+    assert KVerifier(puzzle).is_solved(_board)